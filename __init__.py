@@ -1,15 +1,74 @@
 """The Swedish VMA Alerts integration."""
 import asyncio
+import heapq
 import logging
-import json
+import time
 from datetime import timedelta
 
 from homeassistant.config_entries import ConfigEntry
-from homeassistant.core import HomeAssistant
+from homeassistant.const import ATTR_LATITUDE, ATTR_LONGITUDE
+from homeassistant.core import CALLBACK_TYPE, HomeAssistant, callback
+from homeassistant.helpers.event import async_track_point_in_utc_time
 from homeassistant.helpers.update_coordinator import DataUpdateCoordinator, UpdateFailed
-import aiohttp
+from homeassistant.util import dt as dt_util
 
-from .const import DOMAIN, SCAN_INTERVAL, PLATFORMS, API_ENDPOINT, TEST_API_ENDPOINT, CONF_SCAN_INTERVAL, CONF_GEOCODES, CONF_GEOCODE, CONF_USE_TEST_API
+from .alerts import VMAAlertStore, merge_responses, project_alert
+from .api import (
+    CircuitBreaker,
+    CircuitOpenError,
+    VMAHttpClient,
+    VMARateLimitError,
+)
+from .geocodes import build_fetch_plan
+from .hub import VMAFetchHub
+from .metrics import RefreshMetrics
+from .scheduler import AdaptivePollScheduler
+from .storage import VMASnapshotStore
+from .webhook import PAYLOAD_CHANGES, WebhookDispatcher
+
+from .const import (
+    DOMAIN,
+    PLATFORMS,
+    API_ENDPOINT,
+    TEST_API_ENDPOINT,
+    CONF_SCAN_INTERVAL,
+    CONF_SCAN_INTERVAL_MIN,
+    CONF_SCAN_INTERVAL_MAX,
+    DEFAULT_SCAN_INTERVAL_MIN,
+    DEFAULT_SCAN_INTERVAL_MAX,
+    CONF_GEOCODES,
+    CONF_GEOCODE,
+    CONF_PRIORITY_GEOCODES,
+    CONF_USE_TEST_API,
+    CONF_LANGUAGE,
+    DEFAULT_LANGUAGE,
+    CONF_MAX_CONCURRENT_REQUESTS,
+    CONF_FETCH_DEADLINE,
+    DEFAULT_MAX_CONCURRENT_REQUESTS,
+    DEFAULT_FETCH_DEADLINE,
+    DEFAULT_REQUEST_TIMEOUT,
+    DATA_CLIENT,
+    DATA_WEBHOOKS,
+    DATA_HUB,
+    CONF_WEBHOOK_URL,
+    TIER_PRIORITY,
+    TIER_REGIONAL,
+    TIER_NATIONAL,
+    TIER_MULTIPLIERS,
+    TIER_DUE_TOLERANCE,
+    CONF_BATCH_EVENTS,
+    DEFAULT_BATCH_EVENTS,
+    MESSAGE_TYPE_UPDATE,
+    MESSAGE_TYPE_CANCEL,
+    STATUS_ACTUAL,
+    URGENCY_IMMEDIATE,
+    ATTR_URGENCY,
+    ATTR_HEADLINE,
+    ATTR_DESCRIPTION,
+    ATTR_INSTRUCTION,
+    ATTR_SENT,
+    ATTR_EXPIRES,
+)
 from .services import async_setup_services, async_unload_services
 
 _LOGGER = logging.getLogger(__name__)
@@ -26,13 +85,38 @@ async def async_setup_entry(hass: HomeAssistant, entry: ConfigEntry) -> bool:
         entry_data[CONF_GEOCODES] = [entry_data[CONF_GEOCODE]]
         hass.config_entries.async_update_entry(entry, data=entry_data)
     
+    # All entries share one pooled HTTP session, one fetch hub and one
+    # webhook dispatcher
+    if DATA_CLIENT not in hass.data[DOMAIN]:
+        hass.data[DOMAIN][DATA_CLIENT] = VMAHttpClient(hass)
+    if DATA_HUB not in hass.data[DOMAIN]:
+        hass.data[DOMAIN][DATA_HUB] = VMAFetchHub(hass, hass.data[DOMAIN][DATA_CLIENT])
+    if DATA_WEBHOOKS not in hass.data[DOMAIN]:
+        dispatcher = WebhookDispatcher(hass, hass.data[DOMAIN][DATA_CLIENT])
+        dispatcher.async_start()
+        hass.data[DOMAIN][DATA_WEBHOOKS] = dispatcher
+    
     coordinator = VMADataUpdateCoordinator(hass, entry)
-    await coordinator.async_config_entry_first_refresh()
+    _async_update_host_limit(hass, coordinator)
+    
+    # Start from the cached snapshot when there is one, so a slow or
+    # unreachable API does not keep the integration from loading
+    snapshot = await coordinator.snapshot_store.async_load()
+    if snapshot:
+        coordinator.async_restore_snapshot(snapshot)
+    else:
+        await coordinator.async_config_entry_first_refresh()
     
     hass.data[DOMAIN][entry.entry_id] = coordinator
+    entry.async_on_unload(coordinator.async_cancel_expiry_timer)
 
     await hass.config_entries.async_forward_entry_setups(entry, PLATFORMS)
     
+    if snapshot:
+        entry.async_create_background_task(
+            hass, coordinator.async_refresh(), f"{DOMAIN} refresh after restore"
+        )
+    
     # Set up services
     await async_setup_services(hass)
 
@@ -42,14 +126,43 @@ async def async_unload_entry(hass: HomeAssistant, entry: ConfigEntry) -> bool:
     """Unload a config entry."""
     unload_ok = await hass.config_entries.async_unload_platforms(entry, PLATFORMS)
     if unload_ok:
-        hass.data[DOMAIN].pop(entry.entry_id)
+        coordinator = hass.data[DOMAIN].pop(entry.entry_id)
+        await coordinator.snapshot_store.async_flush()
+        coordinator.hub.async_remove_consumer(entry.entry_id)
+        _async_update_host_limit(hass)
         
-        # If this is the last entry, unload services
-        if not hass.data[DOMAIN]:
+        # If this is the last entry, unload services, drop the fetch hub,
+        # stop the webhook dispatcher and close the session
+        if not any(
+            isinstance(value, VMADataUpdateCoordinator)
+            for value in hass.data[DOMAIN].values()
+        ):
             await async_unload_services(hass)
+            hass.data[DOMAIN].pop(DATA_HUB, None)
+            dispatcher = hass.data[DOMAIN].pop(DATA_WEBHOOKS, None)
+            if dispatcher is not None:
+                await dispatcher.async_stop()
+            client = hass.data[DOMAIN].pop(DATA_CLIENT, None)
+            if client is not None:
+                await client.async_close()
 
     return unload_ok
 
+@callback
+def _async_update_host_limit(hass: HomeAssistant, *coordinators) -> None:
+    """Let the shared client run as many requests as the largest entry cap."""
+    caps = [
+        value.max_concurrent_requests
+        for value in [*hass.data[DOMAIN].values(), *coordinators]
+        if isinstance(value, VMADataUpdateCoordinator)
+    ]
+    if caps:
+        hass.data[DOMAIN][DATA_CLIENT].set_limit_per_host(max(caps))
+
+async def async_remove_entry(hass: HomeAssistant, entry: ConfigEntry) -> None:
+    """Remove the cached snapshot of a removed config entry."""
+    await VMASnapshotStore(hass, entry.entry_id).async_remove()
+
 class VMADataUpdateCoordinator(DataUpdateCoordinator):
     """Class to manage fetching VMA data."""
 
@@ -58,145 +171,587 @@ class VMADataUpdateCoordinator(DataUpdateCoordinator):
         self.hass = hass
         self.entry = entry
         self.api_endpoint = TEST_API_ENDPOINT if entry.data.get(CONF_USE_TEST_API, False) else API_ENDPOINT
-        self.geocodes = entry.data.get(CONF_GEOCODES, [])
-        self.previous_alerts = {}
+        self.priority_geocodes = entry.data.get(CONF_PRIORITY_GEOCODES, [])
+        # Priority geocodes are polled even if they were not also selected
+        self.geocodes = list(
+            dict.fromkeys([*self.priority_geocodes, *entry.data.get(CONF_GEOCODES, [])])
+        )
+        # A län and its kommuner are fetched once, at the län level
+        self.fetch_plan = build_fetch_plan(
+            self.geocodes, lambda geocode: TIER_MULTIPLIERS[self._tier(geocode)]
+        )
+        # Next time each polling tier is due, missing until first polled,
+        # and its current poll interval in seconds
+        self._tier_due = {}
+        self._tier_interval = {}
+        # Set while a refresh that was not scheduled, such as the first or a
+        # manual one, runs; it polls every tier
+        self._poll_all_tiers = False
+        self.language = entry.data.get(CONF_LANGUAGE, DEFAULT_LANGUAGE)
+        self.hub: VMAFetchHub = hass.data[DOMAIN][DATA_HUB]
+        self.seen_alert_ids = set()
+        self.last_alert_changes = {"added": [], "updated": [], "cancelled": []}
+        self.batch_events = entry.data.get(CONF_BATCH_EVENTS, DEFAULT_BATCH_EVENTS)
+        # Changes are pushed to this URL when set
+        self.webhook_url = entry.data.get(CONF_WEBHOOK_URL) or None
+        self.max_concurrent_requests = entry.data.get(
+            CONF_MAX_CONCURRENT_REQUESTS, DEFAULT_MAX_CONCURRENT_REQUESTS
+        )
+        self.fetch_deadline = entry.data.get(CONF_FETCH_DEADLINE, DEFAULT_FETCH_DEADLINE)
+        self.failed_geocodes = set()
+        self.metrics = RefreshMetrics()
+        self._breakers = {}
+        self._last_success = {}
+        # Validators and the parsed response for each endpoint URL, used to
+        # short-circuit unchanged responses
+        self._last_responses = {}
+        # Per-alert listeners and the min-heap of upcoming effective/expires
+        # boundaries that drives them
+        self._alert_listeners = {}
+        self._timing_heap = []
+        self._timing_store = None
+        self._unsub_timing = None
+        # Alerts whose fingerprint changed in the last refresh, None for all
+        self._changed_alert_ids = None
+        self.snapshot_store = VMASnapshotStore(hass, entry.entry_id)
         
-        # Get the update interval from the config entry
-        update_interval = entry.data.get(CONF_SCAN_INTERVAL, SCAN_INTERVAL)
+        # The poll interval adapts between a floor and a ceiling. Entries
+        # from before the adaptive scheduler use their fixed interval as the
+        # ceiling so they never poll less often than before.
+        ceiling = entry.data.get(
+            CONF_SCAN_INTERVAL_MAX,
+            entry.data.get(CONF_SCAN_INTERVAL, DEFAULT_SCAN_INTERVAL_MAX),
+        )
+        floor = min(entry.data.get(CONF_SCAN_INTERVAL_MIN, DEFAULT_SCAN_INTERVAL_MIN), ceiling)
+        self.scheduler = AdaptivePollScheduler(floor, ceiling)
+        self._retry_after = None
         
         super().__init__(
             hass,
             _LOGGER,
             name=DOMAIN,
-            update_interval=timedelta(seconds=update_interval),
+            update_interval=timedelta(seconds=floor),
+            # Listeners are only notified when the returned data object changes
+            always_update=False,
         )
 
     async def _async_update_data(self):
         """Fetch data from the VMA API."""
+        self._retry_after = None
+        self.metrics.count("refreshes")
+        start = time.perf_counter()
         try:
-            # If we have geocodes, fetch data for each geocode
-            if self.geocodes:
-                all_alerts = {}
-                for geocode in self.geocodes:
-                    alerts = await self._fetch_data_for_geocode(geocode)
-                    all_alerts.update(alerts)
-                
-                # Also fetch alerts without a geocode filter to catch national alerts
-                national_alerts = await self._fetch_data_for_geocode()
-                all_alerts.update(national_alerts)
-                
-                # Check for new alerts and fire events
-                self._check_for_new_alerts(all_alerts)
-                
-                return all_alerts
+            # If we have geocodes, fetch data for each planned geocode and
+            # also the unfiltered feed to catch national alerts. No geocodes
+            # means only the unfiltered feed is fetched.
+            targets = [*self.fetch_plan, None]
+            
+            # Only the tiers whose timer is due are fetched, the others keep
+            # their last response. The first refresh and manual ones poll
+            # every tier.
+            now = dt_util.utcnow()
+            tiers = {self._tier(geocode) for geocode in targets}
+            if self._poll_all_tiers or not self._tier_due:
+                polled_tiers = tiers
             else:
-                # No geocodes specified, fetch all alerts
-                alerts = await self._fetch_data_for_geocode()
-                
-                # Check for new alerts and fire events
-                self._check_for_new_alerts(alerts)
-                
-                return alerts
-                
+                horizon = now + timedelta(seconds=TIER_DUE_TOLERANCE)
+                due = {tier: self._tier_due.get(tier, now) for tier in tiers}
+                polled_tiers = {tier for tier in tiers if due[tier] <= horizon} or {
+                    min(tiers, key=due.get)
+                }
+            with self.metrics.timer("fetch"):
+                fetched = await self._async_fetch_all(
+                    [geocode for geocode in targets if self._tier(geocode) in polled_tiers]
+                )
+            all_failed = not fetched
+            
+            # Geocodes that were not polled, or failed, keep their last good
+            # response. Failures only make the affected geocodes stale.
+            responses = {}
+            stale_geocodes = set()
+            for geocode in targets:
+                if geocode in fetched:
+                    responses[geocode] = fetched[geocode]
+                    self._last_success[geocode] = now
+                elif geocode in self._last_responses:
+                    responses[geocode] = self._last_responses[geocode]
+                    if geocode in self.failed_geocodes:
+                        stale_geocodes.add(geocode)
+            
+            if not responses:
+                raise UpdateFailed("No geocode could be fetched from the VMA API")
+            if all_failed:
+                _LOGGER.warning("VMA API unavailable, serving the last known alerts")
+            
+            # Only published while areas are stale, so it does not change on
+            # every refresh and defeat the unchanged path below
+            last_success = min(
+                (self._last_success[geocode] for geocode in stale_geocodes if geocode in self._last_success),
+                default=None,
+            )
+
+            # Every endpoint answered 304 or an identical body, so there is
+            # nothing to parse, merge or push to the entities
+            if self.data is not None and self._responses_unchanged(responses):
+                _LOGGER.debug("VMA alerts unchanged since last update")
+                self.metrics.count("unchanged_refreshes")
+                self._adapt_interval(self.data, polled_tiers, failed=all_failed)
+                if stale_geocodes == self.data.stale_geocodes:
+                    return self.data
+                # Only the freshness changed, the alert entities stay as they are
+                self._changed_alert_ids = set()
+                return self.data.with_status(stale_geocodes, last_success)
+            self._last_responses = responses
+
+            # Responses are ordered like the targets, national feed last
+            with self.metrics.timer("merge"):
+                merged, matched, timestamp = merge_responses(responses, self.fetch_plan)
+
+            with self.metrics.timer("normalize"):
+                store = VMAAlertStore.from_merged(
+                    merged, matched, timestamp, self.language, self._locations()
+                )
+                store = store.with_status(stale_geocodes, last_success)
+            self.metrics.count("alerts_parsed", len(store))
+
+            # Check for new alerts and fire events
+            with self.metrics.timer("events"):
+                self._check_for_new_alerts(store)
+            self.snapshot_store.async_schedule_save(self._snapshot)
+            self._changed_alert_ids = self._changed_alerts(store)
+            self._async_schedule_timing(store)
+            self._adapt_interval(
+                store,
+                polled_tiers,
+                recent_update=bool(self.last_alert_changes["updated"]),
+                failed=all_failed,
+            )
+            return store
+
         except Exception as err:
             _LOGGER.error("Error fetching VMA data: %s", err)
+            self.metrics.count("failed_refreshes")
+            self._adapt_interval(None, None, failed=True)
             raise UpdateFailed(f"Error fetching VMA data: {err}")
-    
-    def _check_for_new_alerts(self, current_alerts):
-        """Check for new alerts and fire events for them."""
-        # Find new alerts that weren't in the previous update
-        new_alerts = {
-            alert_id: alert_data 
-            for alert_id, alert_data in current_alerts.items() 
-            if alert_id not in self.previous_alerts
+        finally:
+            self.metrics.record("refresh", time.perf_counter() - start)
+
+    async def _async_refresh(self, *args, scheduled=False, **kwargs):
+        """Refresh data, polling every tier unless the refresh was scheduled."""
+        self._poll_all_tiers = not scheduled
+        try:
+            await super()._async_refresh(*args, scheduled=scheduled, **kwargs)
+        finally:
+            self._poll_all_tiers = False
+
+    def _tier(self, geocode):
+        """Return the polling tier of a geocode, None being the national feed."""
+        if geocode is None:
+            return TIER_NATIONAL
+        if geocode in self.priority_geocodes:
+            return TIER_PRIORITY
+        return TIER_REGIONAL
+
+    def _adapt_interval(self, store, polled_tiers, recent_update=False, failed=False):
+        """Schedule each polling tier from alert activity and API health.
+
+        polled_tiers are the tiers fetched in this refresh, None when the
+        refresh failed before that was known, which reschedules every tier.
+        """
+        hot = recent_update or any(
+            alert.status == STATUS_ACTUAL
+            and alert.in_effect
+            and alert.attributes.get(ATTR_URGENCY) == URGENCY_IMMEDIATE
+            for alert in store or ()
+        )
+        seconds = self.scheduler.next_interval(
+            hot=hot, failed=failed, retry_after=self._retry_after
+        )
+        
+        # Without priority geocodes every tier is polled at the same rate.
+        # The slower tiers never wait past the ceiling, only a Retry-After
+        # beyond it holds them back further.
+        now = dt_util.utcnow()
+        targets = [*self.fetch_plan, None]
+        for tier in {self._tier(geocode) for geocode in targets}:
+            multiplier = TIER_MULTIPLIERS[tier] if self.priority_geocodes else 1
+            interval = max(seconds, min(self.scheduler.ceiling, seconds * multiplier))
+            due = now + timedelta(seconds=interval)
+            if (
+                polled_tiers is None
+                or tier in polled_tiers
+                or self._retry_after is not None
+                or due < self._tier_due.get(tier, due)
+            ):
+                self._tier_due[tier] = due
+                self._tier_interval[tier] = interval
+        
+        next_due = min(self._tier_due.values())
+        self.update_interval = max(next_due - now, timedelta(seconds=1))
+        _LOGGER.debug("Next VMA poll in %.0f seconds", self.update_interval.total_seconds())
+
+    def _locations(self):
+        """Return the zones to match alert areas against.
+
+        Maps each zone entity id to its latitude, longitude and radius in
+        meters. The home coordinates are used when there is no home zone.
+        """
+        locations = {}
+        for state in self.hass.states.async_all("zone"):
+            latitude = state.attributes.get(ATTR_LATITUDE)
+            longitude = state.attributes.get(ATTR_LONGITUDE)
+            if latitude is None or longitude is None:
+                continue
+            locations[state.entity_id] = (latitude, longitude, state.attributes.get("radius", 0))
+        if "zone.home" not in locations:
+            locations["zone.home"] = (
+                self.hass.config.latitude,
+                self.hass.config.longitude,
+                getattr(self.hass.config, "radius", 0),
+            )
+        return locations
+
+    def _endpoint_url(self, geocode=None):
+        """Return the API URL for a geocode, or for all alerts."""
+        if self.entry.data.get(CONF_USE_TEST_API, False):
+            return TEST_API_ENDPOINT
+        if geocode:
+            # According to the API documentation, geocode should be part of the path
+            return f"{API_ENDPOINT}/{geocode}"
+        return API_ENDPOINT
+
+    def _snapshot(self):
+        """Return the data persisted by the snapshot store."""
+        store = self.data
+        endpoints = {}
+        for geocode, response in self._last_responses.items():
+            cached = self.hub.endpoint(self._endpoint_url(geocode))
+            if cached is None or cached["data"].get(self.language) is not response:
+                continue
+            endpoints[geocode or ""] = {
+                "etag": cached["etag"],
+                "last_modified": cached["last_modified"],
+                "digest": cached["digest"].hex(),
+                "timestamp": response.get("timestamp"),
+                "ids": [alert["identifier"] for alert in response.get("alerts", [])],
+            }
+        return {
+            "timestamp": store.timestamp if store else None,
+            "alerts": [alert.raw for alert in store] if store else [],
+            "matched": {
+                alert.identifier: sorted(alert.matched_geocodes)
+                for alert in store or ()
+                if alert.matched_geocodes
+            },
+            "endpoints": endpoints,
+            "seen": sorted(self.seen_alert_ids),
+        }
+
+    @callback
+    def async_restore_snapshot(self, snapshot) -> None:
+        """Publish the alerts and HTTP validators of a saved snapshot."""
+        # Snapshots written before language projection hold every language
+        alerts = {
+            alert["identifier"]: project_alert(alert, self.language)
+            for alert in snapshot.get("alerts", [])
         }
         
-        # Fire an event for each new alert
-        for alert_id, alert_data in new_alerts.items():
+        for key, endpoint in snapshot.get("endpoints", {}).items():
+            geocode = key or None
+            self._last_responses[geocode] = self.hub.async_seed(
+                self._endpoint_url(geocode),
+                self.language,
+                endpoint["etag"],
+                endpoint["last_modified"],
+                bytes.fromhex(endpoint["digest"]),
+                {
+                    "timestamp": endpoint["timestamp"],
+                    "alerts": [alerts[i] for i in endpoint["ids"] if i in alerts],
+                },
+            )
+        
+        self.seen_alert_ids = set(snapshot.get("seen", []))
+        store = VMAAlertStore.from_merged(
+            alerts,
+            snapshot.get("matched", {}),
+            snapshot.get("timestamp"),
+            self.language,
+            self._locations(),
+        )
+        self._async_schedule_timing(store)
+        self.async_set_updated_data(store)
+        _LOGGER.debug("Restored %d alerts from the snapshot", len(store))
+
+    @callback
+    def async_add_alert_listener(self, alert_id, update_callback) -> CALLBACK_TYPE:
+        """Listen for changes to a single alert."""
+        listeners = self._alert_listeners.setdefault(alert_id, [])
+        listeners.append(update_callback)
+
+        @callback
+        def remove_listener() -> None:
+            listeners.remove(update_callback)
+            if not listeners:
+                self._alert_listeners.pop(alert_id, None)
+
+        return remove_listener
+
+    @callback
+    def _async_update_alert_listeners(self, alert_ids) -> None:
+        """Notify the listeners of the given alerts."""
+        for alert_id in alert_ids:
+            for update_callback in list(self._alert_listeners.get(alert_id, ())):
+                update_callback()
+
+    @callback
+    def async_update_listeners(self) -> None:
+        """Update the coordinator listeners and the listeners of changed alerts."""
+        with self.metrics.timer("listeners"):
+            super().async_update_listeners()
+            changed, self._changed_alert_ids = self._changed_alert_ids, None
+            if changed is None:
+                changed = list(self._alert_listeners)
+            self._async_update_alert_listeners(changed)
+
+    def _changed_alerts(self, store):
+        """Return the identifiers whose fingerprint differs from the current data.
+
+        Returns None when every alert entity must be updated, which is the
+        case on the first refresh and after a failed one.
+        """
+        previous = self.data
+        if previous is None or not self.last_update_success:
+            return None
+        changed = {alert_id for alert_id in previous.ids if alert_id not in store}
+        for alert in store:
+            old = previous.get(alert.identifier)
+            if old is None or old.fingerprint != alert.fingerprint:
+                changed.add(alert.identifier)
+        return changed
+
+    @callback
+    def _async_schedule_timing(self, store) -> None:
+        """Set the timing flags of a new store and schedule its next boundary."""
+        now = dt_util.utcnow()
+        heap = []
+        for alert in store:
+            alert.update_timing(now)
+            for boundary in (alert.effective, alert.expires):
+                if boundary is not None and boundary > now:
+                    heap.append((boundary, alert.identifier))
+        heapq.heapify(heap)
+
+        self._timing_heap = heap
+        self._timing_store = store
+        self._async_schedule_next_boundary()
+
+    @callback
+    def _async_schedule_next_boundary(self) -> None:
+        """Track the earliest upcoming boundary with a single timer."""
+        self.async_cancel_expiry_timer()
+        if self._timing_heap:
+            self._unsub_timing = async_track_point_in_utc_time(
+                self.hass, self._async_handle_boundary, self._timing_heap[0][0]
+            )
+
+    @callback
+    def _async_handle_boundary(self, now) -> None:
+        """Flip the alerts whose boundary has passed and notify only those."""
+        self._unsub_timing = None
+        now = max(now, dt_util.utcnow())
+        store = self._timing_store
+        changed = set()
+        while self._timing_heap and self._timing_heap[0][0] <= now:
+            _, alert_id = heapq.heappop(self._timing_heap)
+            alert = store.get(alert_id)
+            if alert is not None and alert.update_timing(now):
+                changed.add(alert_id)
+
+        if changed:
+            _LOGGER.debug("Alert timing changed for %s", ", ".join(sorted(changed)))
+            super().async_update_listeners()
+            self._async_update_alert_listeners(changed)
+
+        self._async_schedule_next_boundary()
+
+    @callback
+    def async_cancel_expiry_timer(self) -> None:
+        """Cancel the pending boundary timer."""
+        if self._unsub_timing is not None:
+            self._unsub_timing()
+            self._unsub_timing = None
+
+    def _responses_unchanged(self, responses):
+        """Return True if every endpoint returned its previous response object."""
+        if responses.keys() != self._last_responses.keys():
+            return False
+        return all(
+            response is self._last_responses[geocode]
+            for geocode, response in responses.items()
+        )
+
+    async def _async_fetch_all(self, geocodes):
+        """Fetch all geocodes concurrently within the refresh deadline.
+
+        Returns the responses that completed in time keyed by geocode (None
+        is the national feed). Geocodes that fail, run past the deadline or
+        have an open circuit breaker are left out and recorded in
+        failed_geocodes until their own fetch succeeds again, so one slow
+        kommun cannot fail the whole update.
+        """
+        semaphore = asyncio.Semaphore(self.max_concurrent_requests)
+
+        async def _fetch(geocode):
+            if not self._breaker(geocode).allow_request():
+                raise CircuitOpenError("Circuit breaker open")
+            async with semaphore:
+                return await self._fetch_data_for_geocode(geocode)
+
+        if not geocodes:
+            return {}
+
+        tasks = {asyncio.create_task(_fetch(geocode)): geocode for geocode in geocodes}
+        done, pending = await asyncio.wait(tasks, timeout=self.fetch_deadline)
+
+        for task in pending:
+            task.cancel()
+        if pending:
+            await asyncio.gather(*pending, return_exceptions=True)
+
+        responses = {}
+        failed = set()
+        for task, geocode in tasks.items():
+            breaker = self._breaker(geocode)
+            if task in pending:
+                _LOGGER.warning(
+                    "Fetching geocode %s did not finish within %s seconds",
+                    geocode or "all", self.fetch_deadline,
+                )
+                failed.add(geocode)
+                breaker.record_failure()
+            elif task.exception() is not None:
+                err = task.exception()
+                failed.add(geocode)
+                if isinstance(err, CircuitOpenError):
+                    _LOGGER.debug("Skipping geocode %s, circuit breaker open", geocode or "all")
+                    continue
+                _LOGGER.warning("Fetching geocode %s failed: %s", geocode or "all", err)
+                breaker.record_failure()
+                if isinstance(err, VMARateLimitError) and err.retry_after is not None:
+                    self._retry_after = max(self._retry_after or 0, err.retry_after)
+            else:
+                responses[geocode] = task.result()
+                breaker.record_success()
+
+        # Geocodes of tiers that were not polled keep their failure
+        self.failed_geocodes = (self.failed_geocodes - responses.keys()) | failed
+
+        return responses
+
+    @property
+    def circuit_breakers(self):
+        """Return the state and failure count of each endpoint's breaker."""
+        return {
+            url: {"state": breaker.state, "failures": breaker.failures}
+            for url, breaker in self._breakers.items()
+        }
+
+    def _breaker(self, geocode):
+        """Return the circuit breaker of the endpoint for a geocode."""
+        url = self._endpoint_url(geocode)
+        breaker = self._breakers.get(url)
+        if breaker is None:
+            breaker = self._breakers[url] = CircuitBreaker()
+        return breaker
+    
+    def _check_for_new_alerts(self, store):
+        """Check for new, updated and cancelled alerts and fire events for them."""
+        current_ids = set(store.ids)
+        new_ids = current_ids - self.seen_alert_ids
+        self.seen_alert_ids = current_ids
+        
+        changes = {"added": [], "updated": [], "cancelled": []}
+        for alert_id in new_ids:
+            alert = store.get(alert_id)
+            if alert.msg_type == MESSAGE_TYPE_CANCEL:
+                changes["cancelled"].append(alert)
+            elif alert.msg_type == MESSAGE_TYPE_UPDATE:
+                changes["updated"].append(alert)
+            else:
+                changes["added"].append(alert)
+        self.last_alert_changes = changes
+        
+        if not new_ids:
+            return
+        
+        if self.webhook_url:
+            self.hass.data[DOMAIN][DATA_WEBHOOKS].async_enqueue(
+                self.webhook_url,
+                PAYLOAD_CHANGES,
+                {
+                    kind: [store.details_json(alert) for alert in alerts]
+                    for kind, alerts in changes.items()
+                },
+            )
+            
+        if self.batch_events:
+            # One event per cycle, without the long description texts
             self.hass.bus.async_fire(
-                f"{DOMAIN}_new_alert", 
+                f"{DOMAIN}_alerts_changed",
                 {
-                    "alert_id": alert_id,
-                    "headline": alert_data.get("headline", ""),
-                    "severity": alert_data.get("severity", ""),
-                    "area": alert_data.get("area", []),
-                    "description": alert_data.get("description", ""),
-                    "instruction": alert_data.get("instruction", ""),
-                    "sent": alert_data.get("sent", ""),
-                    "expires": alert_data.get("expires", ""),
-                }
+                    kind: [self._alert_summary(alert) for alert in alerts]
+                    for kind, alerts in changes.items()
+                },
             )
-            _LOGGER.debug(f"Fired event for new alert: {alert_id}")
+            _LOGGER.debug("Fired alerts changed event for %d alerts", len(new_ids))
+            return
         
-        # Update previous alerts for next comparison
-        self.previous_alerts = current_alerts.copy()
+        # Fire an event for each new alert
+        for alerts in changes.values():
+            for alert in alerts:
+                self.hass.bus.async_fire(
+                    f"{DOMAIN}_new_alert", 
+                    {
+                        "alert_id": alert.identifier,
+                        "headline": alert.attributes.get(ATTR_HEADLINE) or "",
+                        "severity": alert.severity or "",
+                        "area": list(alert.areas),
+                        "description": alert.attributes.get(ATTR_DESCRIPTION) or "",
+                        "instruction": alert.attributes.get(ATTR_INSTRUCTION) or "",
+                        "sent": alert.attributes.get(ATTR_SENT) or "",
+                        "expires": alert.attributes.get(ATTR_EXPIRES) or "",
+                    }
+                )
+                _LOGGER.debug(f"Fired event for new alert: {alert.identifier}")
+
+    @staticmethod
+    def _alert_summary(alert):
+        """Return the compact event representation of an alert."""
+        return {
+            "alert_id": alert.identifier,
+            "msg_type": alert.msg_type,
+            "status": alert.status,
+            "headline": alert.attributes.get(ATTR_HEADLINE) or "",
+            "severity": alert.severity or "",
+            "area": list(alert.areas),
+            "references": alert.raw.get("references"),
+            "sent": alert.attributes.get(ATTR_SENT) or "",
+            "expires": alert.attributes.get(ATTR_EXPIRES) or "",
+        }
 
     async def _fetch_data_for_geocode(self, geocode=None):
-        """Fetch data from the VMA API for a specific geocode."""
-        try:
-            async with aiohttp.ClientSession() as session:
-                # Use the test API if configured
-                use_test_api = self.entry.data.get(CONF_USE_TEST_API, False)
-                
-                if use_test_api:
-                    url = TEST_API_ENDPOINT
-                    _LOGGER.debug("Using test API: %s", url)
-                else:
-                    url = API_ENDPOINT
-                    if geocode:
-                        # According to the API documentation, geocode should be part of the path
-                        url = f"{API_ENDPOINT}/{geocode}"
-                
-                _LOGGER.debug("Fetching data from %s", url)
-                
-                async with session.get(url) as response:
-                    if response.status != 200:
-                        _LOGGER.error("Error communicating with API: %s", response.status)
-                        raise UpdateFailed(f"Error communicating with API: {response.status}")
-                    
-                    try:
-                        data = await response.json()
-                        
-                        # Validate the data structure
-                        if not isinstance(data, dict):
-                            _LOGGER.error("Invalid data format: not a dictionary")
-                            return {"timestamp": None, "alerts": []}
-                            
-                        if "alerts" not in data:
-                            _LOGGER.error("Invalid data format: 'alerts' key missing")
-                            data["alerts"] = []
-                            
-                        if not isinstance(data["alerts"], list):
-                            _LOGGER.error("Invalid data format: 'alerts' is not a list")
-                            data["alerts"] = []
-                            
-                        # Validate each alert
-                        valid_alerts = []
-                        for alert in data["alerts"]:
-                            if not alert or not isinstance(alert, dict):
-                                _LOGGER.warning("Skipping invalid alert: %s", alert)
-                                continue
-                                
-                            if "identifier" not in alert:
-                                _LOGGER.warning("Skipping alert without identifier: %s", alert)
-                                continue
-                                
-                            valid_alerts.append(alert)
-                            
-                        data["alerts"] = valid_alerts
-                            
-                        # Log the number of alerts
-                        _LOGGER.debug("Received %d alerts from the API for geocode %s", 
-                                     len(data["alerts"]), geocode if geocode else "all")
-                        
-                        return data
-                    except json.JSONDecodeError as err:
-                        _LOGGER.error("Error decoding JSON: %s", err)
-                        raise UpdateFailed(f"Error decoding JSON: {err}") from err
-                    
-        except aiohttp.ClientError as err:
-            _LOGGER.error("Error communicating with API: %s", err)
-            raise UpdateFailed(f"Error communicating with API: {err}") from err
-        except asyncio.TimeoutError as err:
-            _LOGGER.error("Timeout communicating with API: %s", err)
-            raise UpdateFailed(f"Timeout communicating with API: {err}") from err 
\ No newline at end of file
+        """Fetch data from the VMA API for a specific geocode.
+
+        The request goes through the fetch hub, so an endpoint that other
+        entries also poll is only requested once. A scheduled poll reuses a
+        response another entry fetched within the tier's interval, while the
+        first and manual refreshes only reuse very recent responses.
+        """
+        max_age = 0 if self._poll_all_tiers else self._tier_interval.get(self._tier(geocode), 0)
+        return await self.hub.async_fetch(
+            self._endpoint_url(geocode),
+            self.language,
+            consumer=self.entry.entry_id,
+            max_age=max_age,
+            timeout=min(DEFAULT_REQUEST_TIMEOUT, self.fetch_deadline),
+        )
@@ -0,0 +1,652 @@
+"""Alert model and storage for the Swedish VMA Alerts integration."""
+import sys
+from dataclasses import dataclass, field
+from datetime import datetime
+from typing import Any, Dict, FrozenSet, Iterable, Iterator, List, Optional, Set, Tuple
+
+from homeassistant.helpers.json import json_bytes
+from homeassistant.util import dt as dt_util
+
+from .geo import SpatialIndex, parse_shapes
+from .geocodes import geocode_ancestors, geocode_covers
+from .const import (
+    STATUS_ACTUAL,
+    MESSAGE_TYPE_ALERT,
+    MESSAGE_TYPE_UPDATE,
+    ATTR_HEADLINE,
+    ATTR_DESCRIPTION,
+    ATTR_INSTRUCTION,
+    ATTR_AREA,
+    ATTR_SENT,
+    ATTR_EFFECTIVE,
+    ATTR_EXPIRES,
+    ATTR_STATUS,
+    ATTR_MESSAGE_TYPE,
+    ATTR_SEVERITY,
+    ATTR_URGENCY,
+    ATTR_CERTAINTY,
+    ATTR_EVENT,
+    ATTR_SENDER_NAME,
+    ATTR_WEB,
+    ATTR_CONTACT,
+    ATTR_PARAMETERS,
+    ATTR_MATCHED_GEOCODES,
+    ATTR_AREA_CODES,
+    ATTR_ZONES,
+)
+
+
+def parse_time(value: Any) -> Optional[datetime]:
+    """Parse a CAP timestamp into a timezone-aware datetime."""
+    if not value or not isinstance(value, str):
+        return None
+    try:
+        parsed = dt_util.parse_datetime(value)
+    except ValueError:
+        return None
+    if parsed is None:
+        return None
+    if parsed.tzinfo is None:
+        parsed = parsed.replace(tzinfo=dt_util.DEFAULT_TIME_ZONE)
+    return parsed
+
+
+def _area_geocodes(alert: Dict[str, Any]) -> Set[str]:
+    """Return the most specific geocode values of every area of an alert.
+
+    An area for a kommun usually lists its län too. The län is left out, as
+    it would make the area cover every other kommun of the län.
+    """
+    values = set()
+    for info in alert.get("info") or ():
+        if not isinstance(info, dict):
+            continue
+        for area in info.get("area") or ():
+            if not isinstance(area, dict):
+                continue
+            codes = {
+                geocode["value"]
+                for geocode in area.get("geocode") or ()
+                if isinstance(geocode, dict) and geocode.get("value")
+            }
+            values.update(
+                codes.difference(*(geocode_ancestors(code) for code in codes))
+            )
+    return values
+
+
+def merge_responses(
+    responses: Dict[Optional[str], Dict[str, Any]],
+    served: Optional[Dict[str, Tuple[str, ...]]] = None,
+) -> Tuple[Dict[str, Dict[str, Any]], Dict[str, Set[str]], Optional[str]]:
+    """Merge per-geocode responses into one map keyed by alert identifier.
+
+    Alerts that appear in several kommun feeds and the national feed are
+    kept once, preferring the one with the newest sent time. The alert dicts
+    are referenced, not copied. Returns the merged alerts, the geocodes that
+    matched each alert (the national feed, keyed None, is not recorded) and
+    the newest response timestamp.
+
+    served maps a fetched geocode to the selected geocodes its feed stands
+    in for, as planned by build_fetch_plan. Alerts in such a feed match the
+    fetched geocode and each served geocode their areas cover.
+    """
+    merged: Dict[str, Dict[str, Any]] = {}
+    matched: Dict[str, Set[str]] = {}
+    timestamp = None
+
+    for geocode, data in responses.items():
+        response_timestamp = data.get("timestamp")
+        if response_timestamp and (timestamp is None or response_timestamp > timestamp):
+            timestamp = response_timestamp
+
+        derived = served.get(geocode, ()) if served and geocode is not None else ()
+        for alert in data.get("alerts", []):
+            identifier = alert["identifier"]
+            geocodes = matched.setdefault(identifier, set())
+            if geocode is not None:
+                geocodes.add(geocode)
+            if len(derived) > 1:
+                area_codes = _area_geocodes(alert)
+                geocodes.update(
+                    code
+                    for code in derived
+                    if any(geocode_covers(area_code, code) for area_code in area_codes)
+                )
+
+            current = merged.get(identifier)
+            if current is None:
+                merged[identifier] = alert
+            elif current is not alert and current.get("sent") != alert.get("sent"):
+                current_sent = parse_time(current.get("sent"))
+                sent = parse_time(alert.get("sent"))
+                if sent is not None and (current_sent is None or sent > current_sent):
+                    merged[identifier] = alert
+
+    return merged, matched, timestamp
+
+
+def _freeze(value: Any) -> Any:
+    """Return a hashable copy of nested dicts and lists."""
+    if isinstance(value, dict):
+        return tuple((key, _freeze(item)) for key, item in value.items())
+    if isinstance(value, list):
+        return tuple(_freeze(item) for item in value)
+    return value
+
+
+def _select_info(alert: Dict[str, Any], language: str) -> Optional[Dict[str, Any]]:
+    """Return the info block in the preferred language, or the first valid one."""
+    info_list = alert.get("info")
+    if not isinstance(info_list, list):
+        return None
+    first = None
+    for info in info_list:
+        if not info or not isinstance(info, dict):
+            continue
+        if info.get("language") == language:
+            return info
+        if first is None:
+            first = info
+    return first
+
+
+def _intern(value: Any) -> Any:
+    """Intern a string so equal values share one object across alerts."""
+    return sys.intern(value) if isinstance(value, str) else value
+
+
+# Short values that repeat across alerts and info blocks
+_INTERNED_ALERT_KEYS = ("status", "msgType", "scope")
+_INTERNED_INFO_KEYS = (
+    "language",
+    "category",
+    "event",
+    "urgency",
+    "severity",
+    "certainty",
+    "senderName",
+    "web",
+    "contact",
+)
+
+
+def _project_area(area: Any) -> Any:
+    """Return an area block with its description and geocodes interned."""
+    if not area or not isinstance(area, dict):
+        return area
+    projected = dict(area)
+    if "areaDesc" in area:
+        projected["areaDesc"] = _intern(area["areaDesc"])
+    if isinstance(area.get("geocode"), list):
+        projected["geocode"] = [
+            {key: _intern(value) for key, value in geocode.items()}
+            if isinstance(geocode, dict) else geocode
+            for geocode in area["geocode"]
+        ]
+    return projected
+
+
+def project_alert(alert: Dict[str, Any], language: str) -> Dict[str, Any]:
+    """Return the alert with only the info block for one language.
+
+    The preferred language is kept, falling back to the first valid block
+    when the alert has none in that language, so an alert is never left
+    without text. Repeated strings such as the sender, event and area names
+    are interned so they are shared between alerts.
+    """
+    projected = {
+        key: _intern(value) if key in _INTERNED_ALERT_KEYS else value
+        for key, value in alert.items()
+    }
+    if isinstance(projected.get("sender"), dict):
+        projected["sender"] = {
+            key: _intern(value) for key, value in projected["sender"].items()
+        }
+
+    # A missing info list marks Cancel messages and is kept as it is
+    if not isinstance(alert.get("info"), list):
+        return projected
+
+    info = _select_info(alert, language)
+    if info is None:
+        projected["info"] = []
+        return projected
+
+    info = {
+        key: _intern(value) if key in _INTERNED_INFO_KEYS else value
+        for key, value in info.items()
+    }
+    if isinstance(info.get("area"), list):
+        info["area"] = [_project_area(area) for area in info["area"]]
+    projected["info"] = [info]
+    return projected
+
+
+@dataclass(slots=True)
+class VMAAlert:
+    """A VMA alert normalized for one language.
+
+    Everything the entities and services need is computed once when the
+    coordinator builds its alert store, so property reads on the entities
+    only return precomputed fields.
+    """
+
+    identifier: str
+    status: Optional[str]
+    msg_type: Optional[str]
+    sent: Optional[datetime]
+    effective: Optional[datetime]
+    expires: Optional[datetime]
+    info: Optional[Dict[str, Any]]
+    severity: Optional[str]
+    areas: Tuple[str, ...]
+    geocodes: Tuple[str, ...]
+    parameters: Optional[Dict[str, Any]]
+    name: Optional[str]
+    state: str
+    attributes: Dict[str, Any] = field(repr=False)
+    # Hash of everything the alert sensor shows, used to skip unchanged alerts
+    fingerprint: int = field(repr=False)
+    raw: Dict[str, Any] = field(repr=False)
+    # Configured geocodes whose feed contained the alert
+    matched_geocodes: FrozenSet[str] = frozenset()
+    # Zone entities inside the alert's polygons and circles
+    zones: FrozenSet[str] = frozenset()
+    # Maintained by the coordinator's expiry scheduler
+    expired: bool = False
+    pending: bool = False
+
+    @classmethod
+    def from_dict(
+        cls,
+        alert: Dict[str, Any],
+        language: str,
+        matched_geocodes: Iterable[str] = (),
+        zones: Iterable[str] = (),
+    ) -> "VMAAlert":
+        """Normalize a raw alert from the API."""
+        matched_geocodes = frozenset(matched_geocodes)
+        zones = frozenset(zones)
+        identifier = alert["identifier"]
+        info_list = alert.get("info", [])
+        info = _select_info(alert, language)
+
+        areas: Tuple[str, ...] = ()
+        geocodes: List[str] = []
+        parameters = None
+        if info is not None:
+            area_list = [
+                area for area in info.get("area") or [] if area and isinstance(area, dict)
+            ]
+            areas = tuple(area.get("areaDesc") for area in area_list)
+            for area in area_list:
+                for geocode in area.get("geocode") or []:
+                    if isinstance(geocode, dict) and geocode.get("value"):
+                        if geocode["value"] not in geocodes:
+                            geocodes.append(geocode["value"])
+            if isinstance(info.get("parameter"), list):
+                parameters = {}
+                for param in info["parameter"]:
+                    if param and isinstance(param, dict) and "valueName" in param and "value" in param:
+                        parameters[param["valueName"]] = param["value"]
+
+        name, state, attributes = cls._entity_state(alert, info_list, info, areas, parameters)
+        if matched_geocodes:
+            attributes[ATTR_MATCHED_GEOCODES] = sorted(matched_geocodes)
+        if zones:
+            attributes[ATTR_ZONES] = sorted(zones)
+        fingerprint = hash((name, state, _freeze(attributes)))
+
+        return cls(
+            identifier=identifier,
+            status=alert.get("status"),
+            msg_type=alert.get("msgType"),
+            sent=parse_time(alert.get("sent")),
+            effective=parse_time(info.get("effective")) if info else None,
+            expires=parse_time(info.get("expires")) if info else None,
+            info=info,
+            severity=info.get("severity") if info else None,
+            areas=areas,
+            geocodes=tuple(geocodes),
+            parameters=parameters,
+            name=name,
+            state=state,
+            attributes=attributes,
+            fingerprint=fingerprint,
+            raw=alert,
+            matched_geocodes=matched_geocodes,
+            zones=zones,
+        )
+
+    @staticmethod
+    def _entity_state(
+        alert: Dict[str, Any],
+        info_list: Any,
+        info: Optional[Dict[str, Any]],
+        areas: Tuple[str, ...],
+        parameters: Optional[Dict[str, Any]],
+    ) -> Tuple[Optional[str], str, Dict[str, Any]]:
+        """Return the entity name, state and attributes for an alert."""
+        identifier = alert["identifier"]
+
+        # Handle the case where info is None (Cancel messages)
+        if info_list is None:
+            return f"Alert {identifier}", "Canceled", {
+                ATTR_STATUS: alert.get("status"),
+                ATTR_MESSAGE_TYPE: alert.get("msgType"),
+                ATTR_SENT: alert.get("sent"),
+                ATTR_EVENT: "Alert Canceled",
+            }
+
+        if not info:
+            return None, "Unknown", {}
+
+        # Name the entity after the headline, falling back to the event
+        headline = info.get("headline")
+        if headline:
+            name = headline
+        else:
+            event = info.get("event")
+            if event:
+                name = f"{event} - {identifier}"
+            else:
+                name = f"Alert {identifier}"
+
+        state = info.get("severity") or "Unknown"
+
+        attributes = {
+            ATTR_HEADLINE: info.get("headline"),
+            ATTR_DESCRIPTION: info.get("description"),
+            ATTR_INSTRUCTION: info.get("instruction"),
+            ATTR_AREA: list(areas),
+            ATTR_SENT: alert.get("sent"),
+            ATTR_EFFECTIVE: info.get("effective"),
+            ATTR_EXPIRES: info.get("expires"),
+            ATTR_STATUS: alert.get("status"),
+            ATTR_MESSAGE_TYPE: alert.get("msgType"),
+            ATTR_SEVERITY: info.get("severity"),
+            ATTR_URGENCY: info.get("urgency"),
+            ATTR_CERTAINTY: info.get("certainty"),
+            ATTR_EVENT: info.get("event"),
+            ATTR_SENDER_NAME: alert.get("sender", {}).get("name") if alert.get("sender") and isinstance(alert.get("sender"), dict) else None,
+            ATTR_WEB: info.get("web"),
+            ATTR_CONTACT: info.get("contact"),
+        }
+
+        # Add parameters if available
+        if parameters is not None:
+            attributes[ATTR_PARAMETERS] = parameters
+
+        return name, state, attributes
+
+    @property
+    def details(self) -> Dict[str, Any]:
+        """Return the full details served by the services and webhooks."""
+        return {"id": self.identifier, "state": self.state, **self.attributes}
+
+    @property
+    def summary_attributes(self) -> Dict[str, Any]:
+        """Return the compact attributes used instead of the full text."""
+        attributes = self.attributes
+        return {
+            ATTR_SEVERITY: attributes.get(ATTR_SEVERITY),
+            ATTR_URGENCY: attributes.get(ATTR_URGENCY),
+            ATTR_STATUS: attributes.get(ATTR_STATUS),
+            ATTR_MESSAGE_TYPE: attributes.get(ATTR_MESSAGE_TYPE),
+            ATTR_EFFECTIVE: attributes.get(ATTR_EFFECTIVE),
+            ATTR_EXPIRES: attributes.get(ATTR_EXPIRES),
+            ATTR_AREA_CODES: list(self.geocodes),
+            ATTR_ZONES: sorted(self.zones),
+        }
+
+    @property
+    def can_be_active(self) -> bool:
+        """Return True if this is an actual alert or update."""
+        return self.status == STATUS_ACTUAL and self.msg_type in (
+            MESSAGE_TYPE_ALERT,
+            MESSAGE_TYPE_UPDATE,
+        )
+
+    @property
+    def in_effect(self) -> bool:
+        """Return True if the alert is effective and has not expired."""
+        return not self.expired and not self.pending
+
+    def active_at(self, when: datetime) -> bool:
+        """Return True if the alert is effective and not expired at a time."""
+        return (self.effective is None or self.effective <= when) and (
+            self.expires is None or when < self.expires
+        )
+
+    def update_timing(self, now: datetime) -> bool:
+        """Refresh the expired and pending flags, returning True if either changed."""
+        expired = self.expires is not None and self.expires <= now
+        pending = self.effective is not None and self.effective > now
+        changed = expired != self.expired or pending != self.pending
+        self.expired = expired
+        self.pending = pending
+        return changed
+
+
+class VMAAlertStore:
+    """Alerts from one refresh, indexed for constant-time lookups.
+
+    The indexes are built once when the coordinator publishes new data, so
+    entities and services never have to scan the alert list themselves.
+    """
+
+    __slots__ = (
+        "timestamp",
+        "stale_geocodes",
+        "last_success",
+        "_by_id",
+        "_by_lower_id",
+        "_by_geocode",
+        "_by_severity",
+        "_by_msg_type",
+        "_serialized",
+        "spatial_index",
+    )
+
+    def __init__(self, alerts: Iterable[VMAAlert], timestamp: Optional[str] = None):
+        """Build the indexes."""
+        self.timestamp = timestamp
+        # Geocodes served from the last good response after a failed fetch
+        self.stale_geocodes: FrozenSet[Optional[str]] = frozenset()
+        # When the oldest stale geocode was last fetched, None if none is stale
+        self.last_success: Optional[datetime] = None
+        self._by_id: Dict[str, VMAAlert] = {}
+        self._by_lower_id: Dict[str, VMAAlert] = {}
+        self._by_geocode: Dict[str, List[VMAAlert]] = {}
+        self._by_severity: Dict[str, List[VMAAlert]] = {}
+        self._by_msg_type: Dict[str, List[VMAAlert]] = {}
+        # Serialized alert details, built on first use
+        self._serialized: Dict[str, bytes] = {}
+        self.spatial_index: Optional[SpatialIndex] = None
+
+        for alert in alerts:
+            self._by_id[alert.identifier] = alert
+            self._by_lower_id[alert.identifier.lower()] = alert
+            for geocode in alert.geocodes:
+                self._by_geocode.setdefault(geocode, []).append(alert)
+            if alert.severity:
+                self._by_severity.setdefault(alert.severity, []).append(alert)
+            if alert.msg_type:
+                self._by_msg_type.setdefault(alert.msg_type, []).append(alert)
+
+    @classmethod
+    def from_merged(
+        cls,
+        merged: Dict[str, Dict[str, Any]],
+        matched: Dict[str, Set[str]],
+        timestamp: Optional[str],
+        language: str,
+        locations: Optional[Dict[str, Tuple[float, float, float]]] = None,
+    ) -> "VMAAlertStore":
+        """Normalize merged alerts and build a store.
+
+        locations maps zone entity ids to latitude, longitude and radius in
+        meters. The alert polygons and circles are indexed once and every
+        location is looked up in the index to set the alerts' zones.
+        """
+        shapes = []
+        for identifier, alert in merged.items():
+            info = _select_info(alert, language)
+            if info is not None and isinstance(info.get("area"), list):
+                shapes.extend(parse_shapes(identifier, info["area"]))
+        index = SpatialIndex(shapes)
+
+        zones: Dict[str, Set[str]] = {}
+        if shapes:
+            for zone, (latitude, longitude, radius) in (locations or {}).items():
+                for identifier in index.covering(latitude, longitude, radius):
+                    zones.setdefault(identifier, set()).add(zone)
+
+        store = cls(
+            (
+                VMAAlert.from_dict(
+                    alert, language, matched.get(identifier, ()), zones.get(identifier, ())
+                )
+                for identifier, alert in merged.items()
+            ),
+            timestamp,
+        )
+        store.spatial_index = index
+        return store
+
+    def with_status(
+        self, stale_geocodes: Iterable[Optional[str]], last_success: Optional[datetime]
+    ) -> "VMAAlertStore":
+        """Return a copy sharing the alerts and indexes with a new freshness status."""
+        store = VMAAlertStore.__new__(VMAAlertStore)
+        for slot in self.__slots__:
+            setattr(store, slot, getattr(self, slot))
+        store.stale_geocodes = frozenset(stale_geocodes)
+        store.last_success = last_success
+        return store
+
+    @property
+    def stale(self) -> bool:
+        """Return True if some alerts come from a failed endpoint's last response."""
+        return bool(self.stale_geocodes)
+
+    def __len__(self) -> int:
+        """Return the number of alerts."""
+        return len(self._by_id)
+
+    def __iter__(self) -> Iterator[VMAAlert]:
+        """Iterate over the alerts."""
+        return iter(self._by_id.values())
+
+    def __contains__(self, identifier: str) -> bool:
+        """Return True if an alert with the identifier exists."""
+        return identifier in self._by_id
+
+    @property
+    def ids(self) -> List[str]:
+        """Return the alert identifiers."""
+        return list(self._by_id)
+
+    def get(self, identifier: str) -> Optional[VMAAlert]:
+        """Return the alert with the given identifier.
+
+        Entity ids are lower case, so identifiers taken from an entity id are
+        matched case-insensitively.
+        """
+        alert = self._by_id.get(identifier)
+        if alert is None:
+            alert = self._by_lower_id.get(identifier.lower())
+        return alert
+
+    def by_geocode(self, geocode: str) -> List[VMAAlert]:
+        """Return the alerts that reference a geocode."""
+        return self._by_geocode.get(geocode, [])
+
+    def by_severity(self, severity: str) -> List[VMAAlert]:
+        """Return the alerts with a severity."""
+        return self._by_severity.get(severity, [])
+
+    def by_msg_type(self, msg_type: str) -> List[VMAAlert]:
+        """Return the alerts with a message type."""
+        return self._by_msg_type.get(msg_type, [])
+
+    def active_alerts(self, show_expired: bool = False) -> List[VMAAlert]:
+        """Return the actual alerts and updates that are currently active.
+
+        Without show_expired, alerts that are not in effect or have no info
+        are left out.
+        """
+        active = []
+        for msg_type in (MESSAGE_TYPE_ALERT, MESSAGE_TYPE_UPDATE):
+            for alert in self.by_msg_type(msg_type):
+                if not alert.can_be_active:
+                    continue
+                if not show_expired and (alert.info is None or not alert.in_effect):
+                    continue
+                active.append(alert)
+        return active
+
+    def alerts_covering(
+        self, latitude: float, longitude: float, radius: float = 0
+    ) -> List[VMAAlert]:
+        """Return the alerts whose polygons or circles cover a location."""
+        if self.spatial_index is None:
+            return []
+        return [
+            self._by_id[identifier]
+            for identifier in self.spatial_index.covering(latitude, longitude, radius)
+        ]
+
+    def details_json(self, alert: VMAAlert) -> bytes:
+        """Return the serialized details of an alert.
+
+        The JSON is built once per store, so repeated webhook calls between
+        refreshes only pay for the send.
+        """
+        body = self._serialized.get(alert.identifier)
+        if body is None:
+            body = self._serialized[alert.identifier] = json_bytes(alert.details)
+        return body
+
+    def query(
+        self,
+        severities: Optional[Iterable[str]] = None,
+        geocodes: Optional[Iterable[str]] = None,
+        statuses: Optional[Iterable[str]] = None,
+        msg_types: Optional[Iterable[str]] = None,
+        active_at: Optional[datetime] = None,
+    ) -> List[VMAAlert]:
+        """Return the alerts matching every given filter.
+
+        Each filter accepts several values, any of which may match. The
+        candidates are taken from an index when a geocode, severity or
+        message type filter is given, so the whole store is only scanned
+        for status and time filters.
+        """
+        severities = set(severities) if severities else None
+        geocodes = set(geocodes) if geocodes else None
+        statuses = set(statuses) if statuses else None
+        msg_types = set(msg_types) if msg_types else None
+
+        if geocodes is not None:
+            candidates = {
+                alert.identifier: alert
+                for geocode in geocodes
+                for alert in self.by_geocode(geocode)
+            }.values()
+        elif severities is not None:
+            candidates = [alert for severity in severities for alert in self.by_severity(severity)]
+        elif msg_types is not None:
+            candidates = [alert for msg_type in msg_types for alert in self.by_msg_type(msg_type)]
+        else:
+            candidates = self._by_id.values()
+
+        return [
+            alert
+            for alert in candidates
+            if (severities is None or alert.severity in severities)
+            and (statuses is None or alert.status in statuses)
+            and (msg_types is None or alert.msg_type in msg_types)
+            and (active_at is None or alert.active_at(active_at))
+        ]
@@ -0,0 +1,172 @@
+"""HTTP client for the Swedish VMA Alerts integration."""
+import asyncio
+import logging
+import time
+from contextlib import asynccontextmanager
+from email.utils import parsedate_to_datetime
+from typing import Any, Dict, Optional
+from urllib.parse import urlsplit
+
+import aiohttp
+
+from homeassistant.core import HomeAssistant
+from homeassistant.helpers.aiohttp_client import async_create_clientsession
+from homeassistant.helpers.update_coordinator import UpdateFailed
+from homeassistant.util import dt as dt_util
+
+from .const import DEFAULT_MAX_CONCURRENT_REQUESTS
+
+_LOGGER = logging.getLogger(__name__)
+
+
+class VMARateLimitError(UpdateFailed):
+    """The API answered 429 Too Many Requests."""
+
+    def __init__(self, message: str, retry_after: Optional[float] = None):
+        """Initialize the error."""
+        super().__init__(message)
+        self.retry_after = retry_after
+
+
+def parse_retry_after(value: Optional[str]) -> Optional[float]:
+    """Return the seconds to wait from a Retry-After header."""
+    if not value:
+        return None
+    value = value.strip()
+    if value.isdigit():
+        return float(value)
+    try:
+        retry_at = parsedate_to_datetime(value)
+    except (TypeError, ValueError):
+        return None
+    if retry_at.tzinfo is None:
+        return None
+    return max(0.0, (retry_at - dt_util.utcnow()).total_seconds())
+
+
+class CircuitOpenError(UpdateFailed):
+    """Requests to the endpoint are blocked by an open circuit breaker."""
+
+
+class CircuitBreaker:
+    """Stop calling an endpoint that keeps failing.
+
+    The breaker opens after failure_threshold consecutive failures. Once
+    reset_timeout seconds have passed it half-opens and lets a single trial
+    request through, which either closes it again or reopens it.
+    """
+
+    CLOSED = "closed"
+    OPEN = "open"
+    HALF_OPEN = "half_open"
+
+    def __init__(self, failure_threshold: int = 3, reset_timeout: float = 120):
+        """Initialize the breaker."""
+        self._failure_threshold = failure_threshold
+        self._reset_timeout = reset_timeout
+        self.state = self.CLOSED
+        self.failures = 0
+        self._opened_at = 0.0
+
+    def allow_request(self) -> bool:
+        """Return True if a request may be sent now."""
+        if self.state == self.OPEN:
+            if time.monotonic() - self._opened_at < self._reset_timeout:
+                return False
+            self.state = self.HALF_OPEN
+        return True
+
+    def record_success(self) -> None:
+        """Close the breaker after a successful request."""
+        self.state = self.CLOSED
+        self.failures = 0
+
+    def record_failure(self) -> None:
+        """Count a failed request, opening the breaker when needed."""
+        self.failures += 1
+        if self.state == self.HALF_OPEN or self.failures >= self._failure_threshold:
+            if self.state != self.OPEN:
+                _LOGGER.warning(
+                    "Pausing requests to a failing VMA endpoint for %s seconds",
+                    self._reset_timeout,
+                )
+            self.state = self.OPEN
+            self._opened_at = time.monotonic()
+
+
+class VMAHttpClient:
+    """Pooled HTTP session shared by every VMA request.
+
+    The session is created through Home Assistant's aiohttp helper, so it sits
+    on the shared keep-alive connector and its caching DNS resolver instead of
+    doing a new TCP and TLS handshake for every request. Requests to the same
+    host are capped so a burst of geocode fetches cannot monopolize the pool.
+    The cap follows the largest concurrency configured by an entry, so it
+    never holds an entry below its own limit.
+    """
+
+    def __init__(self, hass: HomeAssistant, limit_per_host: int = DEFAULT_MAX_CONCURRENT_REQUESTS):
+        """Initialize the client."""
+        self._limit_per_host = limit_per_host
+        self._host_limits: Dict[str, asyncio.Semaphore] = {}
+        self._stats = {
+            "requests": 0,
+            "connections_created": 0,
+            "connections_reused": 0,
+            "dns_cache_hits": 0,
+            "dns_cache_misses": 0,
+        }
+
+        trace_config = aiohttp.TraceConfig()
+        trace_config.on_request_start.append(self._count("requests"))
+        trace_config.on_connection_create_end.append(self._count("connections_created"))
+        trace_config.on_connection_reuseconn.append(self._count("connections_reused"))
+        trace_config.on_dns_cache_hit.append(self._count("dns_cache_hits"))
+        trace_config.on_dns_cache_miss.append(self._count("dns_cache_misses"))
+
+        # Not cleaned up with the config entry that happens to create it,
+        # since every entry shares it; async_close releases it
+        self.session = async_create_clientsession(
+            hass, auto_cleanup=False, trace_configs=[trace_config]
+        )
+
+    def _count(self, counter: str):
+        """Return a trace callback that increments a counter."""
+
+        async def _increment(session, trace_config_ctx, params) -> None:
+            self._stats[counter] += 1
+
+        return _increment
+
+    @property
+    def stats(self) -> Dict[str, Any]:
+        """Return connection counters, including the reuse ratio."""
+        stats = dict(self._stats)
+        opened = stats["connections_created"] + stats["connections_reused"]
+        stats["connection_reuse_ratio"] = (
+            round(stats["connections_reused"] / opened, 3) if opened else None
+        )
+        return stats
+
+    def set_limit_per_host(self, limit: int) -> None:
+        """Change the number of concurrent requests allowed per host."""
+        if limit != self._limit_per_host:
+            self._limit_per_host = limit
+            # Requests in flight finish on the old semaphores
+            self._host_limits.clear()
+
+    @asynccontextmanager
+    async def request(self, method: str, url: str, **kwargs):
+        """Perform a request, waiting for a free slot for the target host."""
+        host = urlsplit(url).netloc
+        limit = self._host_limits.get(host)
+        if limit is None:
+            limit = self._host_limits[host] = asyncio.Semaphore(self._limit_per_host)
+
+        async with limit:
+            async with self.session.request(method, url, **kwargs) as response:
+                yield response
+
+    async def async_close(self) -> None:
+        """Release the session, leaving Home Assistant's shared connector open."""
+        self.session.detach()
@@ -0,0 +1,48 @@
+"""Run the integration in a bare Home Assistant instance.
+
+The benchmarks that set the integration up through its config flow against
+stand_in_server.py start Home Assistant with these helpers. They use
+startup internals of Home Assistant 2024.1.6.
+"""
+import importlib
+import sys
+from pathlib import Path
+
+# homeassistant.core has to be imported before the loader
+from homeassistant.core import CoreState, HomeAssistant
+from homeassistant import bootstrap, loader
+from homeassistant.config_entries import ConfigEntries
+
+from _integration import INTEGRATION_DIR, PACKAGE
+
+
+async def async_home_assistant(config_dir):
+    """Return a running Home Assistant instance with the integration mounted."""
+    custom_components = Path(config_dir, "custom_components")
+    custom_components.mkdir()
+    custom_components.joinpath(PACKAGE).symlink_to(INTEGRATION_DIR, target_is_directory=True)
+    sys.path.insert(0, config_dir)
+
+    hass = HomeAssistant(config_dir)
+    hass.config.latitude, hass.config.longitude = 59.33, 18.07
+    hass.config.skip_pip = True
+    loader.async_setup(hass)
+    hass.config_entries = ConfigEntries(hass, {})
+    await hass.config_entries.async_initialize()
+    # The registries and entity bookkeeping, as during a normal startup
+    await bootstrap.load_registries(hass)
+    hass.state = CoreState.running
+    return hass
+
+
+def integration_module():
+    """Import the integration mounted by async_home_assistant."""
+    return importlib.import_module(f"custom_components.{PACKAGE}")
+
+
+async def async_stop_home_assistant(hass, config_dir):
+    """Stop an instance and forget the integration it imported."""
+    await hass.async_stop(force=True)
+    sys.path.remove(config_dir)
+    for name in [name for name in sys.modules if name.startswith("custom_components")]:
+        del sys.modules[name]
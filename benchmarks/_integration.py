@@ -0,0 +1,22 @@
+"""Import integration modules without setting up Home Assistant.
+
+The integration directory is registered as the vma_alerts package without
+running its __init__.py, so modules whose imports allow it can be loaded by
+the benchmarks.
+"""
+import importlib
+import sys
+import types
+from pathlib import Path
+
+INTEGRATION_DIR = Path(__file__).resolve().parent.parent
+PACKAGE = "vma_alerts"
+
+
+def load(module: str):
+    """Import a module of the integration, e.g. load("geocodes")."""
+    if PACKAGE not in sys.modules:
+        package = types.ModuleType(PACKAGE)
+        package.__path__ = [str(INTEGRATION_DIR)]
+        sys.modules[PACKAGE] = package
+    return importlib.import_module(f"{PACKAGE}.{module}")
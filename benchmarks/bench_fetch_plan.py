@@ -0,0 +1,142 @@
+"""Compare per-code fetching with the hierarchical fetch plan.
+
+Each selected geocode used to be its own request. With the fetch plan a län
+and its selected kommuner share the län request and the kommuner are matched
+locally. For each scenario and strategy this benchmark sets the integration
+up in a bare Home Assistant instance against the local stand-in API and runs
+refreshes through the coordinator, the fetch hub and merge_responses. The
+payload changes before every refresh, so each one downloads and merges the
+feeds. It reports the requests the stand-in served per refresh, the refresh
+wall time, and whether both strategies matched every alert to the same
+geocodes.
+
+Runs against Home Assistant 2024.1.6, like bench_refresh.py:
+
+    python benchmarks/bench_fetch_plan.py [--alerts 500] [--latency 0.08] [--rounds 5]
+"""
+import argparse
+import asyncio
+import json
+import tempfile
+import time
+from unittest.mock import patch
+
+from _home_assistant import async_home_assistant, async_stop_home_assistant, integration_module
+from _integration import load
+from stand_in_server import StandInAPI, start_server
+
+geocodes = load("geocodes")
+const = load("const")
+
+SCENARIOS = {
+    "kommun only": ["0180"],
+    "län and one kommun": ["01", "0180"],
+    "län and all kommuner": ["01", *[code for code in const.COUNTIES if code.startswith("01") and len(code) == 4]],
+    "three län with kommuner": [
+        "01", "0180", "0114", "0184",
+        "12", "1280", "1283",
+        "14", "1480", "1490", "1485",
+    ],
+    "priority kommun under regional län": ["01", "0180", "0114"],
+}
+PRIORITY = {"priority kommun under regional län": ["0180"]}
+
+
+def _per_code_plan(selected, _tier_rank):
+    """Return a fetch plan requesting every selected code on its own."""
+    return {code: (code,) for code in dict.fromkeys(selected)}
+
+
+async def run_strategy(selected, priority, plan_builder, args):
+    """Refresh one configuration, returning its requests, times and matches."""
+    api = StandInAPI(args.alerts, args.latency, seed=args.seed)
+    runner, url = await start_server(api)
+
+    with tempfile.TemporaryDirectory() as config_dir:
+        hass = await async_home_assistant(config_dir)
+        integration = integration_module()
+        domain = integration.DOMAIN
+
+        with patch.object(integration, "API_ENDPOINT", url), patch.object(
+            integration, "build_fetch_plan", plan_builder
+        ):
+            await hass.config_entries.flow.async_init(
+                domain,
+                context={"source": "user"},
+                data={
+                    "geocodes": selected,
+                    "priority_geocodes": priority,
+                    "max_concurrent_requests": args.concurrency,
+                },
+            )
+            await hass.async_block_till_done()
+
+            entry = hass.config_entries.async_entries(domain)[0]
+            coordinator = hass.data[domain][entry.entry_id]
+            # Every refresh goes to the stand-in instead of being served
+            # from the hub's short-lived cache
+            hass.data[domain][integration.DATA_HUB]._max_age = 0
+
+            requests, times = [], []
+            for _ in range(args.rounds):
+                api.bump()
+                before = api.requests
+                start = time.perf_counter()
+                await coordinator.async_refresh()
+                times.append(time.perf_counter() - start)
+                requests.append(api.requests - before)
+
+            result = {
+                "fetched": len(coordinator.fetch_plan) + 1,
+                "requests": max(requests),
+                "wall_ms": round(min(times) * 1000, 1),
+                "alerts": len(coordinator.data),
+                "matches": {
+                    alert.identifier: sorted(alert.matched_geocodes)
+                    for alert in coordinator.data
+                },
+            }
+
+            await hass.config_entries.async_unload(entry.entry_id)
+        await async_stop_home_assistant(hass, config_dir)
+
+    await runner.cleanup()
+    return result
+
+
+async def main(args):
+    """Run every scenario and print the results as JSON lines."""
+    for name, selected in SCENARIOS.items():
+        priority = PRIORITY.get(name, [])
+        start = time.perf_counter()
+        plan = geocodes.build_fetch_plan(
+            selected, lambda code: 10 if code is None else 1 if code in priority else 4
+        )
+        plan_seconds = time.perf_counter() - start
+
+        results = {}
+        for label, plan_builder in (
+            ("per_code", _per_code_plan),
+            ("planned", geocodes.build_fetch_plan),
+        ):
+            results[label] = await run_strategy(selected, priority, plan_builder, args)
+        same_matches = results["per_code"].pop("matches") == results["planned"].pop("matches")
+
+        print(json.dumps({
+            "scenario": name,
+            "selected": len(selected),
+            **results,
+            "same_matches": same_matches,
+            "plan_us": round(plan_seconds * 1e6, 1),
+            "plan": {code: list(served) for code, served in plan.items()},
+        }, ensure_ascii=False), flush=True)
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--alerts", type=int, default=500, help="alerts served by the stand-in")
+    parser.add_argument("--latency", type=float, default=0.08, help="stand-in response latency in seconds")
+    parser.add_argument("--rounds", type=int, default=5)
+    parser.add_argument("--concurrency", type=int, default=const.DEFAULT_MAX_CONCURRENT_REQUESTS)
+    parser.add_argument("--seed", type=int, default=1)
+    asyncio.run(main(parser.parse_args()))
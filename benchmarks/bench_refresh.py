@@ -0,0 +1,172 @@
+"""Measure end-to-end refreshes against the local stand-in API.
+
+Each scenario starts a stand-in server and a bare Home Assistant instance in
+a temporary config directory, sets the integration up through its config
+flow with the API endpoint pointed at the stand-in, and runs refreshes
+through the coordinator and the sensor and binary_sensor entities. The
+payload changes every few refreshes. Refresh latency, memory, state writes
+and the coordinator's own metrics are reported as one JSON object per
+scenario.
+
+Runs against Home Assistant 2024.1.6, whose startup internals it uses:
+
+    python benchmarks/bench_refresh.py --alerts 0 100 500 2000 --geocodes 20 \
+        --latency 0.05 --error-rate 0.02 --output results.json
+"""
+import argparse
+import asyncio
+import json
+import math
+import resource
+import tempfile
+import time
+import tracemalloc
+from pathlib import Path
+from unittest.mock import patch
+
+from homeassistant.const import EVENT_STATE_CHANGED
+from homeassistant.helpers import entity_registry as er
+
+from _home_assistant import async_home_assistant, async_stop_home_assistant, integration_module
+from stand_in_server import KOMMUNER, StandInAPI, start_server
+
+
+def _spread_kommuner(count):
+    """Return count kommuner spread over as many counties as possible."""
+    by_county = {}
+    for kommun in KOMMUNER:
+        by_county.setdefault(kommun[:2], []).append(kommun)
+    spread = []
+    while len(spread) < count and any(by_county.values()):
+        for kommuner in by_county.values():
+            if kommuner and len(spread) < count:
+                spread.append(kommuner.pop(0))
+    return spread
+
+
+async def run_scenario(alerts, language, geocodes, args):
+    """Run one scenario and return its results."""
+    api = StandInAPI(alerts, args.latency, args.jitter, args.error_rate, args.error_status, args.seed)
+    runner, url = await start_server(api)
+
+    tracemalloc.start()
+    baseline = tracemalloc.get_traced_memory()[0]
+    with tempfile.TemporaryDirectory() as config_dir:
+        hass = await async_home_assistant(config_dir)
+        integration = integration_module()
+        domain = integration.DOMAIN
+
+        state_changes = 0
+
+        def _count_state_change(event):
+            nonlocal state_changes
+            state_changes += 1
+
+        hass.bus.async_listen(EVENT_STATE_CHANGED, _count_state_change)
+
+        with patch.object(integration, "API_ENDPOINT", url):
+            start = time.perf_counter()
+            await hass.config_entries.flow.async_init(
+                domain,
+                context={"source": "user"},
+                data={"geocodes": _spread_kommuner(geocodes), "language": language},
+            )
+            await hass.async_block_till_done()
+            setup = time.perf_counter() - start
+
+            entry = hass.config_entries.async_entries(domain)[0]
+            coordinator = hass.data[domain][entry.entry_id]
+            # Every refresh goes to the stand-in instead of being served
+            # from the hub's short-lived cache
+            hass.data[domain][integration.DATA_HUB]._max_age = 0
+            setup_writes = state_changes
+
+            latencies = []
+            for refresh in range(args.refreshes):
+                if args.change_every and refresh % args.change_every == 0:
+                    api.bump()
+                start = time.perf_counter()
+                await coordinator.async_refresh()
+                await hass.async_block_till_done()
+                latencies.append(time.perf_counter() - start)
+
+            current, peak = tracemalloc.get_traced_memory()
+            entities = len(er.async_entries_for_config_entry(er.async_get(hass), entry.entry_id))
+            result = {
+                "alerts": alerts,
+                "language": language,
+                "geocodes": geocodes,
+                "fetch_plan": len(coordinator.fetch_plan),
+                "latency": args.latency,
+                "error_rate": args.error_rate,
+                "setup_ms": round(setup * 1000, 3),
+                "refresh_ms": _summary(latencies),
+                "memory_kib": {
+                    "current": round((current - baseline) / 1024, 1),
+                    "peak": round((peak - baseline) / 1024, 1),
+                    "max_rss": resource.getrusage(resource.RUSAGE_SELF).ru_maxrss,
+                },
+                "entities": entities,
+                "state_writes": {
+                    "setup": setup_writes,
+                    "refreshes": state_changes - setup_writes,
+                    "per_refresh": round((state_changes - setup_writes) / max(args.refreshes, 1), 2),
+                },
+                "coordinator": coordinator.metrics.as_dict(),
+                "hub": hass.data[domain][integration.DATA_HUB].stats,
+                "server": api.stats,
+            }
+
+            await hass.config_entries.async_unload(entry.entry_id)
+        await async_stop_home_assistant(hass, config_dir)
+
+    tracemalloc.stop()
+    await runner.cleanup()
+    return result
+
+
+def _summary(samples):
+    """Return the mean and nearest-rank percentiles of samples in ms."""
+    if not samples:
+        return {"count": 0}
+    ordered = sorted(samples)
+
+    def _rank(percent):
+        return round(ordered[max(0, math.ceil(percent / 100 * len(ordered)) - 1)] * 1000, 3)
+
+    return {
+        "count": len(ordered),
+        "mean": round(sum(ordered) / len(ordered) * 1000, 3),
+        "p50": _rank(50),
+        "p95": _rank(95),
+        "p99": _rank(99),
+        "max": round(ordered[-1] * 1000, 3),
+    }
+
+
+async def main(args):
+    """Run every scenario, printing and collecting the results."""
+    results = []
+    for alerts in args.alerts:
+        for language in args.languages:
+            result = await run_scenario(alerts, language, args.geocodes, args)
+            print(json.dumps(result), flush=True)
+            results.append(result)
+    if args.output:
+        Path(args.output).write_text(json.dumps(results, indent=2))
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--alerts", type=int, nargs="+", default=[0, 100, 500, 2000])
+    parser.add_argument("--languages", nargs="+", default=["sv-SE", "en-US"])
+    parser.add_argument("--geocodes", type=int, default=20, help="kommuner to configure, 0 for the national feed")
+    parser.add_argument("--refreshes", type=int, default=20)
+    parser.add_argument("--change-every", type=int, default=5, help="refreshes between payload changes")
+    parser.add_argument("--latency", type=float, default=0.0)
+    parser.add_argument("--jitter", type=float, default=0.0)
+    parser.add_argument("--error-rate", type=float, default=0.0)
+    parser.add_argument("--error-status", type=int, default=500)
+    parser.add_argument("--seed", type=int, default=1)
+    parser.add_argument("--output", help="also write all results to this JSON file")
+    asyncio.run(main(parser.parse_args()))
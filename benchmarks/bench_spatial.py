@@ -0,0 +1,78 @@
+"""Measure the spatial index against a linear scan of alert shapes.
+
+Random polygons and circles are spread over Sweden, then zone lookups are
+timed through the STR R-tree and by testing every shape. Results are
+checked to be identical.
+
+    python benchmarks/bench_spatial.py [--shapes 500] [--queries 2000]
+"""
+import argparse
+import json
+import math
+import random
+import time
+
+from _integration import load
+
+geo = load("geo")
+
+
+def _random_shapes(count, rng):
+    """Return count polygons and circles with roughly kommun-sized extents."""
+    shapes = []
+    for i in range(count):
+        lat, lon = rng.uniform(55.3, 69.0), rng.uniform(11.0, 24.0)
+        if i % 2:
+            shapes.append(geo.Circle(f"alert-{i}", lat, lon, rng.uniform(1000, 30000)))
+            continue
+        size = rng.uniform(0.05, 0.5)
+        points = [
+            (lat + size * math.sin(step / 12 * 2 * math.pi), lon + 2 * size * math.cos(step / 12 * 2 * math.pi))
+            for step in range(12)
+        ]
+        shapes.append(geo.Polygon(f"alert-{i}", [*points, points[0]]))
+    return shapes
+
+
+def main(count, queries, seed):
+    """Run the benchmark and print the result as JSON."""
+    rng = random.Random(seed)
+    shapes = _random_shapes(count, rng)
+    locations = [
+        (rng.uniform(55.3, 69.0), rng.uniform(11.0, 24.0), rng.choice((0, 100, 1000)))
+        for _ in range(queries)
+    ]
+
+    start = time.perf_counter()
+    index = geo.SpatialIndex(shapes)
+    build = time.perf_counter() - start
+
+    start = time.perf_counter()
+    indexed = [index.covering(lat, lon, radius) for lat, lon, radius in locations]
+    indexed_time = time.perf_counter() - start
+
+    start = time.perf_counter()
+    scanned = [
+        {shape.alert_id for shape in shapes if shape.covers(lat, lon, radius)}
+        for lat, lon, radius in locations
+    ]
+    scan_time = time.perf_counter() - start
+
+    assert indexed == scanned, "index and linear scan disagree"
+    print(json.dumps({
+        "shapes": count,
+        "queries": queries,
+        "build_ms": round(build * 1000, 3),
+        "index_us_per_query": round(indexed_time / queries * 1e6, 2),
+        "scan_us_per_query": round(scan_time / queries * 1e6, 2),
+        "matches": sum(len(found) for found in indexed),
+    }))
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--shapes", type=int, default=500)
+    parser.add_argument("--queries", type=int, default=2000)
+    parser.add_argument("--seed", type=int, default=1)
+    args = parser.parse_args()
+    main(args.shapes, args.queries, args.seed)
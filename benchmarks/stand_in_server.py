@@ -0,0 +1,215 @@
+"""Local stand-in for the VMA API serving synthetic CAP payloads.
+
+The server answers /api/v2/alerts and /api/v2/alerts/{geocode} like the real
+API, with alerts in both languages spread over the kommuner in COUNTIES.
+Latency, errors and payload changes can be injected, and ETags are sent so
+conditional requests are answered with 304.
+
+    python benchmarks/stand_in_server.py --alerts 500 --latency 0.05 --port 8080
+"""
+import argparse
+import asyncio
+import hashlib
+import json
+import random
+from datetime import datetime, timedelta, timezone
+
+from aiohttp import web
+
+from _integration import load
+
+const = load("const")
+
+KOMMUNER = sorted(code for code in const.COUNTIES if len(code) == 4)
+SEVERITIES = ("Extreme", "Severe", "Moderate", "Minor")
+API_PATH = "/api/v2/alerts"
+# Filler making the texts about as long as real VMA messages
+FILLER = (
+    "Gå inomhus, stäng dörrar, fönster och ventilation. Lyssna på Sveriges Radio "
+    "för mer information. "
+)
+
+
+def _alert(index, version, rng, base):
+    """Return a synthetic alert with an info block per language."""
+    kommun = rng.choice(KOMMUNER)
+    # Sent over the last hours and in effect for a day, so none has expired
+    now = base - timedelta(minutes=index % 600)
+    if index == 0:
+        # Each payload change updates the first alert only
+        now += timedelta(seconds=version)
+    lat, lon = rng.uniform(55.5, 68.5), rng.uniform(12.0, 23.5)
+    area = {
+        "areaDesc": const.COUNTIES[kommun],
+        "geocode": [
+            {"valueName": "Kommun", "value": kommun},
+            {"valueName": "Län", "value": kommun[:2]},
+        ],
+    }
+    if index % 3 == 0:
+        ring = [(lat + 0.2 * dy, lon + 0.4 * dx) for dy, dx in ((0, 0), (0, 1), (1, 1), (1, 0), (0, 0))]
+        area["polygon"] = [" ".join(f"{p_lat:.4f},{p_lon:.4f}" for p_lat, p_lon in ring)]
+    elif index % 3 == 1:
+        area["circle"] = [f"{lat:.4f},{lon:.4f} 15"]
+
+    def _info(language, headline):
+        return {
+            "language": language,
+            "category": "Safety",
+            "event": "Viktigt meddelande till allmänheten",
+            "urgency": "Immediate" if index % 5 == 0 else "Expected",
+            "severity": SEVERITIES[index % len(SEVERITIES)],
+            "certainty": "Observed",
+            "senderName": "Sveriges Radio",
+            "headline": f"{headline} {index}",
+            "description": FILLER * 2,
+            "instruction": FILLER,
+            "effective": now.isoformat(),
+            "expires": (now + timedelta(days=1)).isoformat(),
+            "web": "https://www.krisinformation.se",
+            "area": [area],
+        }
+
+    return {
+        "identifier": f"SRVMA-BENCH-{index}",
+        "sender": {"name": "Sveriges Radio"},
+        "sent": now.isoformat(),
+        "status": "Actual",
+        "msgType": "Update" if version and index == 0 else "Alert",
+        "scope": "Public",
+        "info": [_info("sv-SE", "Viktigt meddelande"), _info("en-US", "Important message")],
+    }
+
+
+class StandInAPI:
+    """Synthetic VMA API state and request handler."""
+
+    def __init__(self, alerts=100, latency=0.0, jitter=0.0, error_rate=0.0,
+                 error_status=500, seed=1):
+        """Initialize the API."""
+        self.alert_count = alerts
+        self.latency = latency
+        self.jitter = jitter
+        self.error_rate = error_rate
+        self.error_status = error_status
+        self._rng = random.Random(seed)
+        self._seed = seed
+        self.version = 0
+        self.requests = 0
+        self.not_modified = 0
+        self.errors = 0
+        self.bytes_sent = 0
+        self._bodies = {}
+        self._base = datetime.now(timezone.utc).replace(microsecond=0)
+        self._build()
+
+    def _build(self):
+        """Generate the alerts of the current version."""
+        rng = random.Random(self._seed)
+        self._alerts = [
+            _alert(index, self.version, rng, self._base) for index in range(self.alert_count)
+        ]
+        self._bodies = {}
+
+    def bump(self):
+        """Change the payload, as when an alert is updated."""
+        self.version += 1
+        self._build()
+
+    def _body(self, geocode):
+        """Return the serialized response and ETag for a geocode."""
+        cached = self._bodies.get(geocode)
+        if cached is None:
+            if geocode is None:
+                alerts = self._alerts
+            else:
+                alerts = [
+                    alert for alert in self._alerts
+                    if any(
+                        code["value"] == geocode or code["value"].startswith(geocode)
+                        for code in alert["info"][0]["area"][0]["geocode"]
+                    )
+                ]
+            body = json.dumps(
+                {"timestamp": datetime.now(timezone.utc).isoformat(), "alerts": alerts},
+                ensure_ascii=False,
+            ).encode()
+            etag = '"%s"' % hashlib.blake2b(
+                f"{geocode}:{self.version}".encode(), digest_size=8
+            ).hexdigest()
+            cached = self._bodies[geocode] = (body, etag)
+        return cached
+
+    async def handle(self, request):
+        """Answer an alerts request."""
+        self.requests += 1
+        delay = self.latency + self._rng.uniform(0, self.jitter)
+        if delay:
+            await asyncio.sleep(delay)
+        if self.error_rate and self._rng.random() < self.error_rate:
+            self.errors += 1
+            return web.Response(status=self.error_status, headers={"Retry-After": "1"})
+
+        body, etag = self._body(request.match_info.get("geocode"))
+        if request.headers.get("If-None-Match") == etag:
+            self.not_modified += 1
+            return web.Response(status=304, headers={"ETag": etag})
+        self.bytes_sent += len(body)
+        return web.Response(body=body, content_type="application/json", headers={"ETag": etag})
+
+    @property
+    def stats(self):
+        """Return the request counters."""
+        return {
+            "requests": self.requests,
+            "not_modified": self.not_modified,
+            "errors": self.errors,
+            "bytes_sent": self.bytes_sent,
+        }
+
+    def app(self):
+        """Return the aiohttp application."""
+        app = web.Application()
+        app.router.add_get(API_PATH, self.handle)
+        app.router.add_get(API_PATH + "/{geocode}", self.handle)
+        return app
+
+
+async def start_server(api, host="127.0.0.1", port=0):
+    """Start serving an API, returning the runner and the base URL."""
+    runner = web.AppRunner(api.app(), access_log=None)
+    await runner.setup()
+    site = web.TCPSite(runner, host, port)
+    await site.start()
+    port = runner.addresses[0][1]
+    return runner, f"http://{host}:{port}{API_PATH}"
+
+
+async def _serve(args):
+    """Run the server until interrupted."""
+    api = StandInAPI(args.alerts, args.latency, args.jitter, args.error_rate, args.error_status)
+    runner, url = await start_server(api, args.host, args.port)
+    print(f"Serving {args.alerts} synthetic alerts at {url}")
+    try:
+        while True:
+            await asyncio.sleep(args.bump_every or 3600)
+            if args.bump_every:
+                api.bump()
+    finally:
+        await runner.cleanup()
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8080)
+    parser.add_argument("--alerts", type=int, default=100)
+    parser.add_argument("--latency", type=float, default=0.0, help="seconds added to every response")
+    parser.add_argument("--jitter", type=float, default=0.0, help="random extra latency in seconds")
+    parser.add_argument("--error-rate", type=float, default=0.0, help="share of requests that fail")
+    parser.add_argument("--error-status", type=int, default=500)
+    parser.add_argument("--bump-every", type=float, default=0, help="change the payload every N seconds")
+    try:
+        asyncio.run(_serve(parser.parse_args()))
+    except KeyboardInterrupt:
+        pass
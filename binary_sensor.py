@@ -1,14 +1,13 @@
 """Binary sensor platform for Swedish VMA Alerts integration."""
 import logging
-from datetime import datetime
-from typing import Any, Dict, Optional
+from typing import List
 
 from homeassistant.components.binary_sensor import (
     BinarySensorEntity,
     BinarySensorDeviceClass,
 )
 from homeassistant.config_entries import ConfigEntry
-from homeassistant.core import HomeAssistant
+from homeassistant.core import HomeAssistant, callback
 from homeassistant.helpers.entity_platform import AddEntitiesCallback
 from homeassistant.helpers.update_coordinator import CoordinatorEntity
 
@@ -17,9 +16,8 @@ from .const import (
     DEFAULT_NAME,
     CONF_SHOW_EXPIRED,
     DEFAULT_SHOW_EXPIRED,
-    STATUS_ACTUAL,
-    MESSAGE_TYPE_ALERT,
-    MESSAGE_TYPE_UPDATE,
+    ATTR_STALE,
+    ATTR_LAST_SUCCESS,
 )
 
 _LOGGER = logging.getLogger(__name__)
@@ -46,96 +44,46 @@ class VMAAlertBinarySensor(CoordinatorEntity, BinarySensorEntity):
         self._attr_name = f"{DEFAULT_NAME} Active"
         self._attr_unique_id = f"{entry.entry_id}_active"
         self._attr_icon = "mdi:alert-circle"
+        self._last_written = None
+        self._update_state()
 
-    @property
-    def is_on(self) -> bool:
-        """Return True if there are active alerts."""
-        if not self.coordinator.data or "alerts" not in self.coordinator.data:
-            return False
-            
-        show_expired = self._entry.data.get(CONF_SHOW_EXPIRED, DEFAULT_SHOW_EXPIRED)
-        
-        # Check for active alerts
-        for alert in self.coordinator.data["alerts"]:
-            # Skip if alert is None or not a dictionary
-            if not alert or not isinstance(alert, dict):
-                continue
-                
-            # Skip if not an actual alert or update
-            if alert.get("status") != STATUS_ACTUAL:
-                continue
-                
-            if alert.get("msgType") not in [MESSAGE_TYPE_ALERT, MESSAGE_TYPE_UPDATE]:
-                continue
-                
-            # Skip expired alerts if show_expired is False
-            if not show_expired:
-                info_list = alert.get("info", [])
-                if not info_list or not isinstance(info_list, list) or len(info_list) == 0:
-                    continue
-                    
-                info = None
-                for i in info_list:
-                    if i and isinstance(i, dict):
-                        info = i
-                        break
-                        
-                if not info:
-                    continue
-                    
-                expires = info.get("expires")
-                if expires and datetime.fromisoformat(expires.replace("Z", "+00:00")) < datetime.now():
-                    continue
-                    
-            # If we get here, there's at least one active alert
-            return True
-                
-        return False
+    def _update_state(self) -> None:
+        """Compute the state from the alert store."""
+        active_alerts = self._active_alert_ids()
+        self._attr_is_on = bool(active_alerts)
+        self._attr_extra_state_attributes = {
+            "active_alerts": len(active_alerts),
+            "alert_ids": active_alerts,
+        }
+        store = self.coordinator.data
+        if store:
+            self._attr_extra_state_attributes[ATTR_STALE] = store.stale
+            self._attr_extra_state_attributes[ATTR_LAST_SUCCESS] = (
+                store.last_success.isoformat() if store.last_success else None
+            )
 
-    @property
-    def extra_state_attributes(self) -> Dict[str, Any]:
-        """Return the state attributes."""
-        if not self.coordinator.data or "alerts" not in self.coordinator.data:
-            return {"active_alerts": 0, "alert_ids": []}
+    def _active_alert_ids(self) -> List[str]:
+        """Return the identifiers of the active alerts."""
+        if not self.coordinator.data:
+            return []
             
         show_expired = self._entry.data.get(CONF_SHOW_EXPIRED, DEFAULT_SHOW_EXPIRED)
-        
-        # Count active alerts
-        active_alerts = []
-        for alert in self.coordinator.data["alerts"]:
-            # Skip if alert is None or missing required fields
-            if not alert or not isinstance(alert, dict) or "identifier" not in alert:
-                continue
-                
-            # Skip if not an actual alert or update
-            if alert.get("status") != STATUS_ACTUAL:
-                continue
-                
-            if alert.get("msgType") not in [MESSAGE_TYPE_ALERT, MESSAGE_TYPE_UPDATE]:
-                continue
-                
-            # Skip expired alerts if show_expired is False
-            if not show_expired:
-                info_list = alert.get("info", [])
-                if not info_list or not isinstance(info_list, list) or len(info_list) == 0:
-                    continue
-                    
-                info = None
-                for i in info_list:
-                    if i and isinstance(i, dict):
-                        info = i
-                        break
-                        
-                if not info:
-                    continue
-                    
-                expires = info.get("expires")
-                if expires and datetime.fromisoformat(expires.replace("Z", "+00:00")) < datetime.now():
-                    continue
-                    
-            active_alerts.append(alert["identifier"])
-                
-        return {
-            "active_alerts": len(active_alerts),
-            "alert_ids": active_alerts,
-        } 
\ No newline at end of file
+        return [alert.identifier for alert in self.coordinator.data.active_alerts(show_expired)]
+
+    @callback
+    def _handle_coordinator_update(self) -> None:
+        """Write the state only when the derived values changed."""
+        self._update_state()
+        written = (
+            self.available,
+            self._attr_is_on,
+            tuple(self._attr_extra_state_attributes["alert_ids"]),
+            self._attr_extra_state_attributes.get(ATTR_STALE),
+            self._attr_extra_state_attributes.get(ATTR_LAST_SUCCESS),
+        )
+        if written == self._last_written:
+            self.coordinator.metrics.count("skipped_writes")
+            return
+        self._last_written = written
+        self.coordinator.metrics.count("state_writes")
+        super()._handle_coordinator_update()
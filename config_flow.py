@@ -12,14 +12,27 @@ from .const import (
     DOMAIN,
     CONF_GEOCODE,
     CONF_GEOCODES,
+    CONF_PRIORITY_GEOCODES,
     CONF_LANGUAGE,
     CONF_SHOW_EXPIRED,
     CONF_SCAN_INTERVAL,
+    CONF_SCAN_INTERVAL_MIN,
+    CONF_SCAN_INTERVAL_MAX,
     CONF_USE_TEST_API,
+    CONF_BATCH_EVENTS,
+    CONF_COMPACT_ATTRIBUTES,
+    CONF_WEBHOOK_URL,
+    CONF_MAX_CONCURRENT_REQUESTS,
+    CONF_FETCH_DEADLINE,
     DEFAULT_LANGUAGE,
     DEFAULT_SHOW_EXPIRED,
     DEFAULT_USE_TEST_API,
-    SCAN_INTERVAL,
+    DEFAULT_BATCH_EVENTS,
+    DEFAULT_COMPACT_ATTRIBUTES,
+    DEFAULT_SCAN_INTERVAL_MIN,
+    DEFAULT_SCAN_INTERVAL_MAX,
+    DEFAULT_MAX_CONCURRENT_REQUESTS,
+    DEFAULT_FETCH_DEADLINE,
     API_ENDPOINT,
     COUNTIES,
 )
@@ -51,6 +64,13 @@ class VMAFlowHandler(config_entries.ConfigFlow, domain=DOMAIN):
                         
                 if not valid:
                     errors[CONF_GEOCODES] = "invalid_geocode"
+                    
+            if not self._validate_scan_intervals(user_input):
+                errors["base"] = "invalid_scan_interval"
+            if not self._validate_fetch_deadline(user_input):
+                errors[CONF_FETCH_DEADLINE] = "invalid_fetch_deadline"
+            if not self._validate_webhook_url(user_input):
+                errors[CONF_WEBHOOK_URL] = "invalid_webhook_url"
 
             if not errors:
                 return self.async_create_entry(
@@ -62,14 +82,29 @@ class VMAFlowHandler(config_entries.ConfigFlow, domain=DOMAIN):
         schema = vol.Schema(
             {
                 vol.Optional(CONF_GEOCODES, default=[]): cv.multi_select(COUNTIES),
+                vol.Optional(CONF_PRIORITY_GEOCODES, default=[]): cv.multi_select(COUNTIES),
                 vol.Optional(CONF_LANGUAGE, default=DEFAULT_LANGUAGE): vol.In(
                     ["sv-SE", "en-US"]
                 ),
                 vol.Optional(CONF_SHOW_EXPIRED, default=DEFAULT_SHOW_EXPIRED): cv.boolean,
-                vol.Optional(CONF_SCAN_INTERVAL, default=SCAN_INTERVAL): vol.All(
+                vol.Optional(CONF_SCAN_INTERVAL_MIN, default=DEFAULT_SCAN_INTERVAL_MIN): vol.All(
                     vol.Coerce(int), vol.Range(min=30, max=3600)
                 ),
+                vol.Optional(CONF_SCAN_INTERVAL_MAX, default=DEFAULT_SCAN_INTERVAL_MAX): vol.All(
+                    vol.Coerce(int), vol.Range(min=30, max=3600)
+                ),
+                vol.Optional(
+                    CONF_MAX_CONCURRENT_REQUESTS, default=DEFAULT_MAX_CONCURRENT_REQUESTS
+                ): vol.All(vol.Coerce(int), vol.Range(min=1, max=20)),
+                vol.Optional(CONF_FETCH_DEADLINE, default=DEFAULT_FETCH_DEADLINE): vol.All(
+                    vol.Coerce(int), vol.Range(min=5, max=3599)
+                ),
                 vol.Optional(CONF_USE_TEST_API, default=DEFAULT_USE_TEST_API): cv.boolean,
+                vol.Optional(CONF_BATCH_EVENTS, default=DEFAULT_BATCH_EVENTS): cv.boolean,
+                vol.Optional(
+                    CONF_COMPACT_ATTRIBUTES, default=DEFAULT_COMPACT_ATTRIBUTES
+                ): cv.boolean,
+                vol.Optional(CONF_WEBHOOK_URL, default=""): str,
             }
         )
 
@@ -86,6 +121,32 @@ class VMAFlowHandler(config_entries.ConfigFlow, domain=DOMAIN):
             return False
         return True
 
+    @staticmethod
+    def _validate_scan_intervals(user_input) -> bool:
+        """Validate that the scan interval floor does not exceed the ceiling."""
+        return user_input.get(CONF_SCAN_INTERVAL_MIN, DEFAULT_SCAN_INTERVAL_MIN) <= user_input.get(
+            CONF_SCAN_INTERVAL_MAX, DEFAULT_SCAN_INTERVAL_MAX
+        )
+
+    @staticmethod
+    def _validate_fetch_deadline(user_input) -> bool:
+        """Validate that a refresh ends before the next one can start."""
+        return user_input.get(CONF_FETCH_DEADLINE, DEFAULT_FETCH_DEADLINE) < user_input.get(
+            CONF_SCAN_INTERVAL_MIN, DEFAULT_SCAN_INTERVAL_MIN
+        )
+
+    @staticmethod
+    def _validate_webhook_url(user_input) -> bool:
+        """Validate the optional webhook URL."""
+        url = user_input.get(CONF_WEBHOOK_URL)
+        if not url:
+            return True
+        try:
+            cv.url(url)
+        except vol.Invalid:
+            return False
+        return True
+
     @staticmethod
     @callback
     def async_get_options_flow(config_entry):
@@ -120,6 +181,13 @@ class VMAOptionsFlowHandler(config_entries.OptionsFlow):
                         
                 if not valid:
                     errors[CONF_GEOCODES] = "invalid_geocode"
+                    
+            if not self._validate_scan_intervals(user_input):
+                errors["base"] = "invalid_scan_interval"
+            if not self._validate_fetch_deadline(user_input):
+                errors[CONF_FETCH_DEADLINE] = "invalid_fetch_deadline"
+            if not self._validate_webhook_url(user_input):
+                errors[CONF_WEBHOOK_URL] = "invalid_webhook_url"
 
             if not errors:
                 return self.async_create_entry(title="", data=user_input)
@@ -138,6 +206,12 @@ class VMAOptionsFlowHandler(config_entries.OptionsFlow):
                 CONF_GEOCODES,
                 default=current_geocodes,
             ): cv.multi_select(COUNTIES),
+            vol.Optional(
+                CONF_PRIORITY_GEOCODES,
+                default=self.config_entry.options.get(
+                    CONF_PRIORITY_GEOCODES, self.config_entry.data.get(CONF_PRIORITY_GEOCODES, [])
+                ),
+            ): cv.multi_select(COUNTIES),
             vol.Optional(
                 CONF_LANGUAGE,
                 default=self.config_entry.options.get(
@@ -151,17 +225,62 @@ class VMAOptionsFlowHandler(config_entries.OptionsFlow):
                 ),
             ): cv.boolean,
             vol.Optional(
-                CONF_SCAN_INTERVAL,
+                CONF_SCAN_INTERVAL_MIN,
+                default=self.config_entry.options.get(
+                    CONF_SCAN_INTERVAL_MIN, self.config_entry.data.get(CONF_SCAN_INTERVAL_MIN, DEFAULT_SCAN_INTERVAL_MIN)
+                ),
+            ): vol.All(vol.Coerce(int), vol.Range(min=30, max=3600)),
+            vol.Optional(
+                CONF_SCAN_INTERVAL_MAX,
                 default=self.config_entry.options.get(
-                    CONF_SCAN_INTERVAL, self.config_entry.data.get(CONF_SCAN_INTERVAL, SCAN_INTERVAL)
+                    CONF_SCAN_INTERVAL_MAX,
+                    self.config_entry.data.get(
+                        CONF_SCAN_INTERVAL_MAX,
+                        self.config_entry.data.get(CONF_SCAN_INTERVAL, DEFAULT_SCAN_INTERVAL_MAX),
+                    ),
                 ),
             ): vol.All(vol.Coerce(int), vol.Range(min=30, max=3600)),
+            vol.Optional(
+                CONF_MAX_CONCURRENT_REQUESTS,
+                default=self.config_entry.options.get(
+                    CONF_MAX_CONCURRENT_REQUESTS,
+                    self.config_entry.data.get(
+                        CONF_MAX_CONCURRENT_REQUESTS, DEFAULT_MAX_CONCURRENT_REQUESTS
+                    ),
+                ),
+            ): vol.All(vol.Coerce(int), vol.Range(min=1, max=20)),
+            vol.Optional(
+                CONF_FETCH_DEADLINE,
+                default=self.config_entry.options.get(
+                    CONF_FETCH_DEADLINE,
+                    self.config_entry.data.get(CONF_FETCH_DEADLINE, DEFAULT_FETCH_DEADLINE),
+                ),
+            ): vol.All(vol.Coerce(int), vol.Range(min=5, max=3599)),
             vol.Optional(
                 CONF_USE_TEST_API,
                 default=self.config_entry.options.get(
                     CONF_USE_TEST_API, self.config_entry.data.get(CONF_USE_TEST_API, DEFAULT_USE_TEST_API)
                 ),
             ): cv.boolean,
+            vol.Optional(
+                CONF_BATCH_EVENTS,
+                default=self.config_entry.options.get(
+                    CONF_BATCH_EVENTS, self.config_entry.data.get(CONF_BATCH_EVENTS, DEFAULT_BATCH_EVENTS)
+                ),
+            ): cv.boolean,
+            vol.Optional(
+                CONF_COMPACT_ATTRIBUTES,
+                default=self.config_entry.options.get(
+                    CONF_COMPACT_ATTRIBUTES,
+                    self.config_entry.data.get(CONF_COMPACT_ATTRIBUTES, DEFAULT_COMPACT_ATTRIBUTES),
+                ),
+            ): cv.boolean,
+            vol.Optional(
+                CONF_WEBHOOK_URL,
+                default=self.config_entry.options.get(
+                    CONF_WEBHOOK_URL, self.config_entry.data.get(CONF_WEBHOOK_URL, "")
+                ),
+            ): str,
         }
 
         return self.async_show_form(
@@ -174,4 +293,30 @@ class VMAOptionsFlowHandler(config_entries.OptionsFlow):
         # Simple validation - should be a string of numbers
         if not geocode.isdigit():
             return False
-        return True 
\ No newline at end of file
+        return True
+
+    @staticmethod
+    def _validate_scan_intervals(user_input) -> bool:
+        """Validate that the scan interval floor does not exceed the ceiling."""
+        return user_input.get(CONF_SCAN_INTERVAL_MIN, DEFAULT_SCAN_INTERVAL_MIN) <= user_input.get(
+            CONF_SCAN_INTERVAL_MAX, DEFAULT_SCAN_INTERVAL_MAX
+        )
+
+    @staticmethod
+    def _validate_fetch_deadline(user_input) -> bool:
+        """Validate that a refresh ends before the next one can start."""
+        return user_input.get(CONF_FETCH_DEADLINE, DEFAULT_FETCH_DEADLINE) < user_input.get(
+            CONF_SCAN_INTERVAL_MIN, DEFAULT_SCAN_INTERVAL_MIN
+        )
+
+    @staticmethod
+    def _validate_webhook_url(user_input) -> bool:
+        """Validate the optional webhook URL."""
+        url = user_input.get(CONF_WEBHOOK_URL)
+        if not url:
+            return True
+        try:
+            cv.url(url)
+        except vol.Invalid:
+            return False
+        return True
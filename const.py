@@ -13,15 +13,62 @@ CONF_GEOCODE = "geocode"
 CONF_GEOCODES = "geocodes"
 CONF_LANGUAGE = "language"
 CONF_SHOW_EXPIRED = "show_expired"
-CONF_SCAN_INTERVAL = "scan_interval"
+CONF_SCAN_INTERVAL = "scan_interval"  # fixed interval used by older entries
+CONF_SCAN_INTERVAL_MIN = "scan_interval_min"
+CONF_SCAN_INTERVAL_MAX = "scan_interval_max"
 CONF_USE_TEST_API = "use_test_api"
+CONF_MAX_CONCURRENT_REQUESTS = "max_concurrent_requests"
+CONF_FETCH_DEADLINE = "fetch_deadline"
+CONF_BATCH_EVENTS = "batch_events"
+CONF_PRIORITY_GEOCODES = "priority_geocodes"
+CONF_COMPACT_ATTRIBUTES = "compact_attributes"
+CONF_WEBHOOK_URL = "webhook_url"
 
 # Default values
 DEFAULT_LANGUAGE = "sv-SE"
 DEFAULT_SHOW_EXPIRED = False
 DEFAULT_NAME = "VMA Alerts"
 DEFAULT_USE_TEST_API = False
-SCAN_INTERVAL = 60  # seconds
+DEFAULT_BATCH_EVENTS = False
+DEFAULT_COMPACT_ATTRIBUTES = False
+DEFAULT_WEBHOOK_QUEUE_SIZE = 100
+DEFAULT_WEBHOOK_CONCURRENCY = 2  # requests per webhook URL
+DEFAULT_WEBHOOK_TIMEOUT = 10  # seconds
+DEFAULT_WEBHOOK_ATTEMPTS = 4
+DEFAULT_SCAN_INTERVAL_MIN = 30  # seconds
+DEFAULT_SCAN_INTERVAL_MAX = 300  # seconds
+
+# Polling tiers. With priority geocodes configured, each tier is polled at a
+# multiple of the adaptive interval, e.g. 30 s / 2 min / 5 min at a 30 s floor.
+TIER_PRIORITY = "priority"
+TIER_REGIONAL = "regional"
+TIER_NATIONAL = "national"
+TIER_MULTIPLIERS = {
+    TIER_PRIORITY: 1,
+    TIER_REGIONAL: 4,
+    TIER_NATIONAL: 10,
+}
+# Home Assistant can fire a scheduled refresh up to about a second early, so
+# a tier due within this many seconds is polled in that refresh
+TIER_DUE_TOLERANCE = 2  # seconds
+DEFAULT_MAX_CONCURRENT_REQUESTS = 6
+DEFAULT_FETCH_DEADLINE = 25  # seconds, must stay below the shortest scan interval
+# Each API request is cut off after this long, or the entry's deadline if
+# shorter, so a stalled endpoint cannot hold its connection slot
+DEFAULT_REQUEST_TIMEOUT = 20  # seconds
+
+# Response bodies above the cap are rejected, and bodies above the offload
+# size are decoded in the executor instead of on the event loop
+MAX_RESPONSE_BYTES = 4 * 1024 * 1024
+DECODE_OFFLOAD_BYTES = 256 * 1024
+
+# Responses fetched by one entry are reused by the others for this long
+DEFAULT_HUB_MAX_AGE = 15  # seconds
+
+# Keys for integration-wide objects in hass.data[DOMAIN]
+DATA_CLIENT = "client"
+DATA_WEBHOOKS = "webhooks"
+DATA_HUB = "hub"
 
 # Alert statuses
 STATUS_ACTUAL = "Actual"
@@ -72,6 +119,11 @@ ATTR_SENDER_NAME = "sender_name"
 ATTR_WEB = "web"
 ATTR_CONTACT = "contact"
 ATTR_PARAMETERS = "parameters"
+ATTR_MATCHED_GEOCODES = "matched_geocodes"
+ATTR_AREA_CODES = "area_codes"
+ATTR_ZONES = "zones"
+ATTR_STALE = "stale"
+ATTR_LAST_SUCCESS = "last_success"
 
 # Swedish counties (län) and municipalities (kommuner) with codes
 COUNTIES = {
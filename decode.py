@@ -0,0 +1,130 @@
+"""Response decoding for the Swedish VMA Alerts integration."""
+import json
+import logging
+import time
+from typing import Any, Dict, Optional, Tuple
+
+from homeassistant.helpers.update_coordinator import UpdateFailed
+
+from .alerts import project_alert
+from .metrics import RollingStats
+
+try:
+    import orjson
+except ImportError:  # pragma: no cover - orjson ships with Home Assistant
+    orjson = None
+
+_LOGGER = logging.getLogger(__name__)
+
+READ_CHUNK_SIZE = 64 * 1024
+
+
+class PayloadTooLargeError(UpdateFailed):
+    """The response body is larger than the configured cap."""
+
+
+class PayloadDecodeError(UpdateFailed):
+    """The response body is not valid JSON."""
+
+
+async def async_read_body(response, max_size: int) -> bytes:
+    """Read a response body, giving up as soon as it exceeds max_size bytes."""
+    if response.content_length is not None and response.content_length > max_size:
+        raise PayloadTooLargeError(
+            f"Response of {response.content_length} bytes exceeds the {max_size} byte cap"
+        )
+
+    chunks = []
+    size = 0
+    async for chunk in response.content.iter_chunked(READ_CHUNK_SIZE):
+        size += len(chunk)
+        if size > max_size:
+            raise PayloadTooLargeError(f"Response exceeds the {max_size} byte cap")
+        chunks.append(chunk)
+    return b"".join(chunks)
+
+
+def decode_alert_payload(
+    body: bytes, language: Optional[str] = None
+) -> Tuple[Dict[str, Any], int, float]:
+    """Decode and validate an API response body.
+
+    Alerts that are not objects or lack an identifier are dropped in the same
+    pass that builds the alert list. With a language, each alert is also
+    projected to that language's info block so the other language is never
+    kept. Returns the data, the number of dropped alerts and the seconds
+    spent decoding and validating.
+    """
+    start = time.perf_counter()
+    try:
+        data = orjson.loads(body) if orjson is not None else json.loads(body)
+    # Both json and orjson raise subclasses of ValueError
+    except ValueError as err:
+        raise PayloadDecodeError(f"Error decoding JSON: {err}") from err
+
+    if not isinstance(data, dict):
+        _LOGGER.error("Invalid data format: not a dictionary")
+        return {"timestamp": None, "alerts": []}, 0, time.perf_counter() - start
+
+    alerts = data.get("alerts")
+    if alerts is None:
+        _LOGGER.error("Invalid data format: 'alerts' key missing")
+        alerts = []
+    elif not isinstance(alerts, list):
+        _LOGGER.error("Invalid data format: 'alerts' is not a list")
+        alerts = []
+
+    data["alerts"] = [
+        project_alert(alert, language) if language else alert
+        for alert in alerts
+        if isinstance(alert, dict) and "identifier" in alert
+    ]
+    dropped = len(alerts) - len(data["alerts"])
+    if dropped:
+        _LOGGER.warning("Skipped %d alerts without an identifier", dropped)
+
+    return data, dropped, time.perf_counter() - start
+
+
+class DecodeStats:
+    """Counters for the time spent decoding API responses."""
+
+    def __init__(self):
+        """Initialize the counters."""
+        self.decodes = 0
+        self.offloaded = 0
+        self.bytes = 0
+        self.alerts = 0
+        self.dropped_alerts = 0
+        self.oversized = 0
+        self.timings = RollingStats()
+        # Decoding that ran on the event loop, the part that blocks it
+        self.loop_seconds = 0.0
+
+    def record(
+        self, size: int, alerts: int, dropped: int, seconds: float, offloaded: bool
+    ) -> None:
+        """Record one decoded response."""
+        self.decodes += 1
+        self.bytes += size
+        self.alerts += alerts
+        self.dropped_alerts += dropped
+        self.timings.add(seconds)
+        if offloaded:
+            self.offloaded += 1
+        else:
+            self.loop_seconds += seconds
+
+    def as_dict(self) -> Dict[str, Any]:
+        """Return the counters with times in milliseconds."""
+        return {
+            "backend": "orjson" if orjson is not None else "json",
+            "decodes": self.decodes,
+            "offloaded": self.offloaded,
+            "bytes": self.bytes,
+            "alerts": self.alerts,
+            "dropped_alerts": self.dropped_alerts,
+            "oversized": self.oversized,
+            "decode_ms": self.timings.as_dict(scale=1000),
+            "loop_blocking_ms": round(self.loop_seconds * 1000, 3),
+        }
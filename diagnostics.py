@@ -0,0 +1,44 @@
+"""Diagnostics support for the Swedish VMA Alerts integration."""
+from typing import Any, Dict
+
+from homeassistant.components.diagnostics import async_redact_data
+from homeassistant.config_entries import ConfigEntry
+from homeassistant.core import HomeAssistant
+
+from .const import DOMAIN, DATA_CLIENT, DATA_HUB, DATA_WEBHOOKS, CONF_WEBHOOK_URL
+
+TO_REDACT = {CONF_WEBHOOK_URL}
+
+
+async def async_get_config_entry_diagnostics(
+    hass: HomeAssistant, entry: ConfigEntry
+) -> Dict[str, Any]:
+    """Return diagnostics for a config entry."""
+    domain_data = hass.data[DOMAIN]
+    coordinator = domain_data[entry.entry_id]
+    store = coordinator.data
+
+    return {
+        "entry": async_redact_data(dict(entry.data), TO_REDACT),
+        "coordinator": {
+            "last_update_success": coordinator.last_update_success,
+            "update_interval": (
+                coordinator.update_interval.total_seconds()
+                if coordinator.update_interval else None
+            ),
+            "fetch_plan": {
+                geocode: list(served) for geocode, served in coordinator.fetch_plan.items()
+            },
+            "failed_geocodes": sorted(geocode or "all" for geocode in coordinator.failed_geocodes),
+            "circuit_breakers": coordinator.circuit_breakers,
+            "alerts": len(store) if store else 0,
+            "stale": store.stale if store else False,
+            "last_success": (
+                store.last_success.isoformat() if store and store.last_success else None
+            ),
+        },
+        "metrics": coordinator.metrics.as_dict(),
+        "hub": domain_data[DATA_HUB].stats,
+        "http": domain_data[DATA_CLIENT].stats,
+        "webhooks": domain_data[DATA_WEBHOOKS].stats,
+    }
@@ -0,0 +1,233 @@
+"""Spatial matching of alert areas for the Swedish VMA Alerts integration.
+
+CAP areas may carry polygons ("lat,lon lat,lon ...", first and last point
+equal) and circles ("lat,lon radius_km"). The shapes of all alerts are
+parsed once per refresh and packed into an STR R-tree of bounding boxes, so
+checking a location only runs the exact point-in-polygon or distance test
+on the few shapes whose box contains it.
+"""
+import math
+from typing import Any, Iterable, List, Optional, Sequence, Set, Tuple, Union
+
+EARTH_RADIUS = 6371008.8  # meters
+METERS_PER_DEGREE = math.pi * EARTH_RADIUS / 180
+# Entries per R-tree node
+NODE_CAPACITY = 8
+
+BBox = Tuple[float, float, float, float]  # min_lat, min_lon, max_lat, max_lon
+
+
+def _parse_point(text: str) -> Tuple[float, float]:
+    """Parse a "lat,lon" pair."""
+    lat, lon = text.split(",")
+    return float(lat), float(lon)
+
+
+class Polygon:
+    """A CAP polygon."""
+
+    __slots__ = ("alert_id", "points", "bbox")
+
+    def __init__(self, alert_id: str, points: Sequence[Tuple[float, float]]):
+        """Initialize the polygon."""
+        self.alert_id = alert_id
+        self.points = tuple(points)
+        lats = [lat for lat, _ in self.points]
+        lons = [lon for _, lon in self.points]
+        self.bbox: BBox = (min(lats), min(lons), max(lats), max(lons))
+
+    @classmethod
+    def parse(cls, alert_id: str, text: str) -> Optional["Polygon"]:
+        """Parse a CAP polygon, returning None if it is malformed."""
+        try:
+            points = [_parse_point(pair) for pair in text.split()]
+        except ValueError:
+            return None
+        if len(points) < 3:
+            return None
+        return cls(alert_id, points)
+
+    def covers(self, lat: float, lon: float, radius: float = 0) -> bool:
+        """Return True if the point, or the circle of radius meters around it, touches the polygon."""
+        inside = False
+        points = self.points
+        j = len(points) - 1
+        for i in range(len(points)):
+            lat_i, lon_i = points[i]
+            lat_j, lon_j = points[j]
+            if (lat_i > lat) != (lat_j > lat):
+                crossing = lon_i + (lat - lat_i) * (lon_j - lon_i) / (lat_j - lat_i)
+                if lon < crossing:
+                    inside = not inside
+            j = i
+        if inside or radius <= 0:
+            return inside
+        return self._edge_distance(lat, lon) <= radius
+
+    def _edge_distance(self, lat: float, lon: float) -> float:
+        """Return the distance in meters from a point to the nearest edge."""
+        # Equirectangular projection around the point, accurate at zone scale
+        scale = math.cos(math.radians(lat))
+        projected = [
+            ((p_lon - lon) * scale * METERS_PER_DEGREE, (p_lat - lat) * METERS_PER_DEGREE)
+            for p_lat, p_lon in self.points
+        ]
+        best = math.inf
+        for (x1, y1), (x2, y2) in zip(projected, projected[1:] + projected[:1]):
+            dx, dy = x2 - x1, y2 - y1
+            length = dx * dx + dy * dy
+            t = 0.0 if length == 0 else max(0.0, min(1.0, -(x1 * dx + y1 * dy) / length))
+            best = min(best, math.hypot(x1 + t * dx, y1 + t * dy))
+        return best
+
+
+class Circle:
+    """A CAP circle."""
+
+    __slots__ = ("alert_id", "lat", "lon", "radius", "bbox")
+
+    def __init__(self, alert_id: str, lat: float, lon: float, radius: float):
+        """Initialize the circle, radius in meters."""
+        self.alert_id = alert_id
+        self.lat = lat
+        self.lon = lon
+        self.radius = radius
+        d_lat = radius / METERS_PER_DEGREE
+        d_lon = d_lat / max(math.cos(math.radians(lat)), 1e-6)
+        self.bbox: BBox = (lat - d_lat, lon - d_lon, lat + d_lat, lon + d_lon)
+
+    @classmethod
+    def parse(cls, alert_id: str, text: str) -> Optional["Circle"]:
+        """Parse a CAP circle, returning None if it is malformed."""
+        try:
+            center, radius_km = text.split()
+            lat, lon = _parse_point(center)
+            return cls(alert_id, lat, lon, float(radius_km) * 1000)
+        except ValueError:
+            return None
+
+    def covers(self, lat: float, lon: float, radius: float = 0) -> bool:
+        """Return True if the point, or the circle of radius meters around it, touches the circle."""
+        return distance(self.lat, self.lon, lat, lon) <= self.radius + radius
+
+
+Shape = Union[Polygon, Circle]
+
+
+def distance(lat1: float, lon1: float, lat2: float, lon2: float) -> float:
+    """Return the great-circle distance in meters."""
+    phi1, phi2 = math.radians(lat1), math.radians(lat2)
+    d_phi = phi2 - phi1
+    d_lambda = math.radians(lon2 - lon1)
+    a = math.sin(d_phi / 2) ** 2 + math.cos(phi1) * math.cos(phi2) * math.sin(d_lambda / 2) ** 2
+    return 2 * EARTH_RADIUS * math.asin(math.sqrt(a))
+
+
+def _as_list(value: Any) -> List[str]:
+    """Return a CAP field that may be a string or a list of strings as a list."""
+    if isinstance(value, str):
+        return [value]
+    if isinstance(value, list):
+        return [item for item in value if isinstance(item, str)]
+    return []
+
+
+def parse_shapes(alert_id: str, areas: Iterable[Any]) -> List[Shape]:
+    """Parse the polygons and circles of an alert's areas."""
+    shapes: List[Shape] = []
+    for area in areas:
+        if not isinstance(area, dict):
+            continue
+        for text in _as_list(area.get("polygon")):
+            polygon = Polygon.parse(alert_id, text)
+            if polygon is not None:
+                shapes.append(polygon)
+        for text in _as_list(area.get("circle")):
+            circle = Circle.parse(alert_id, text)
+            if circle is not None:
+                shapes.append(circle)
+    return shapes
+
+
+def _union(boxes: Iterable[BBox]) -> BBox:
+    """Return the bounding box of several boxes."""
+    min_lat, min_lon, max_lat, max_lon = math.inf, math.inf, -math.inf, -math.inf
+    for box in boxes:
+        min_lat = min(min_lat, box[0])
+        min_lon = min(min_lon, box[1])
+        max_lat = max(max_lat, box[2])
+        max_lon = max(max_lon, box[3])
+    return min_lat, min_lon, max_lat, max_lon
+
+
+class _Node:
+    """An R-tree node holding shapes (leaf) or child nodes."""
+
+    __slots__ = ("bbox", "children", "leaf")
+
+    def __init__(self, children: Sequence[Any], leaf: bool):
+        """Initialize the node."""
+        self.children = tuple(children)
+        self.leaf = leaf
+        self.bbox = _union(child.bbox for child in self.children)
+
+
+def _pack(items: List[Any], leaf: bool) -> List[_Node]:
+    """Pack items into nodes with Sort-Tile-Recursive ordering."""
+    node_count = math.ceil(len(items) / NODE_CAPACITY)
+    slices = math.ceil(math.sqrt(node_count))
+    slice_size = slices * NODE_CAPACITY
+
+    items = sorted(items, key=lambda item: item.bbox[1] + item.bbox[3])
+    nodes = []
+    for start in range(0, len(items), slice_size):
+        vertical = sorted(
+            items[start:start + slice_size], key=lambda item: item.bbox[0] + item.bbox[2]
+        )
+        for offset in range(0, len(vertical), NODE_CAPACITY):
+            nodes.append(_Node(vertical[offset:offset + NODE_CAPACITY], leaf))
+    return nodes
+
+
+class SpatialIndex:
+    """STR-packed R-tree over the shapes of a set of alerts."""
+
+    __slots__ = ("_root", "size")
+
+    def __init__(self, shapes: Iterable[Shape]):
+        """Bulk load the tree."""
+        shapes = list(shapes)
+        self.size = len(shapes)
+        self._root: Optional[_Node] = None
+        if not shapes:
+            return
+        nodes = _pack(shapes, leaf=True)
+        while len(nodes) > 1:
+            nodes = _pack(nodes, leaf=False)
+        self._root = nodes[0]
+
+    def covering(self, lat: float, lon: float, radius: float = 0) -> Set[str]:
+        """Return the identifiers of the alerts with a shape covering a location.
+
+        radius, in meters, widens the location to a zone.
+        """
+        found: Set[str] = set()
+        if self._root is None:
+            return found
+
+        d_lat = radius / METERS_PER_DEGREE
+        d_lon = d_lat / max(math.cos(math.radians(lat)), 1e-6)
+        min_lat, min_lon, max_lat, max_lon = lat - d_lat, lon - d_lon, lat + d_lat, lon + d_lon
+
+        stack = [self._root]
+        while stack:
+            node = stack.pop()
+            for child in node.children:
+                box = child.bbox
+                if box[0] > max_lat or box[2] < min_lat or box[1] > max_lon or box[3] < min_lon:
+                    continue
+                if not node.leaf:
+                    stack.append(child)
+                elif child.alert_id not in found and child.covers(lat, lon, radius):
+                    found.add(child.alert_id)
+        return found
@@ -0,0 +1,65 @@
+"""Geocode hierarchy for the Swedish VMA Alerts integration.
+
+Kommun codes are four digits starting with the code of their län, and the
+national feed (None) is the parent of every län. The parents of the codes
+in COUNTIES are precomputed so fetch planning is a dictionary lookup.
+"""
+from typing import Callable, Dict, Iterable, Optional, Tuple
+
+from .const import COUNTIES
+
+
+def _parent(code: str) -> Optional[str]:
+    """Derive the parent of a code from its prefix."""
+    if len(code) == 4:
+        return code[:2]
+    return None
+
+
+GEOCODE_PARENTS: Dict[str, Optional[str]] = {code: _parent(code) for code in COUNTIES}
+
+
+def parent_geocode(code: str) -> Optional[str]:
+    """Return the län of a kommun, or None (the national feed) for a län."""
+    try:
+        return GEOCODE_PARENTS[code]
+    except KeyError:
+        return _parent(code)
+
+
+def geocode_ancestors(code: str) -> Tuple[str, ...]:
+    """Return the broader codes containing a code, nearest first."""
+    ancestors = []
+    parent = parent_geocode(code)
+    while parent is not None:
+        ancestors.append(parent)
+        parent = parent_geocode(parent)
+    return tuple(ancestors)
+
+
+def geocode_covers(area_code: str, code: str) -> bool:
+    """Return True if an alert area with area_code applies to code."""
+    return area_code == code or area_code in geocode_ancestors(code)
+
+
+def build_fetch_plan(
+    geocodes: Iterable[str], tier_rank: Callable[[Optional[str]], int]
+) -> Dict[str, Tuple[str, ...]]:
+    """Return the geocodes to fetch and the selected codes each one serves.
+
+    A selected code is served by its broadest selected ancestor, whose feed
+    also contains the code's alerts, so a län and its kommuner need only one
+    request. An ancestor polled less often (a higher tier_rank) is skipped,
+    so a priority kommun is never slowed down by a regional län. The national
+    feed is always fetched separately and is not used to serve codes here.
+    """
+    selected = list(dict.fromkeys(geocodes))
+    chosen = set(selected)
+    plan: Dict[str, Tuple[str, ...]] = {}
+    for code in selected:
+        fetch = code
+        for ancestor in geocode_ancestors(code):
+            if ancestor in chosen and tier_rank(ancestor) <= tier_rank(code):
+                fetch = ancestor
+        plan[fetch] = (*plan.get(fetch, ()), code)
+    return plan
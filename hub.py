@@ -0,0 +1,284 @@
+"""Shared endpoint fetching for the Swedish VMA Alerts integration."""
+import asyncio
+import hashlib
+import logging
+import time
+from typing import Any, Dict, Optional, Tuple
+
+import aiohttp
+
+from homeassistant.core import HomeAssistant, callback
+from homeassistant.helpers.update_coordinator import UpdateFailed
+
+from .api import VMAHttpClient, VMARateLimitError, parse_retry_after
+from .const import (
+    DOMAIN,
+    MAX_RESPONSE_BYTES,
+    DECODE_OFFLOAD_BYTES,
+    DEFAULT_HUB_MAX_AGE,
+    DEFAULT_REQUEST_TIMEOUT,
+)
+from .decode import DecodeStats, PayloadTooLargeError, async_read_body, decode_alert_payload
+
+_LOGGER = logging.getLogger(__name__)
+
+
+class VMAFetchHub:
+    """Fetch every API endpoint once for all config entries.
+
+    Entries that poll the same endpoint, such as the national feed or a
+    shared county, get the response fetched by whichever entry asked first:
+    concurrent requests for a URL wait for the one in flight, and a response
+    younger than max_age seconds is reused without a request. An entry
+    polling on its schedule also reuses a response another entry fetched
+    since its own last poll of the endpoint, as long as it is younger than
+    the entry's poll interval, so each endpoint is requested about once per
+    cycle however the entries' timers drift. The HTTP
+    validators and the response body are kept per URL, and the body is
+    decoded once for each language in use, so each entry still gets alerts
+    projected to its own language.
+    """
+
+    def __init__(
+        self, hass: HomeAssistant, client: VMAHttpClient, max_age: float = DEFAULT_HUB_MAX_AGE
+    ):
+        """Initialize the hub."""
+        self.hass = hass
+        self.client = client
+        self._max_age = max_age
+        self._endpoints: Dict[str, Dict[str, Any]] = {}
+        self._inflight: Dict[Tuple[str, bool], asyncio.Task] = {}
+        # When each consumer was last served each endpoint, by fetch time
+        self._served: Dict[Tuple[str, str], float] = {}
+        self.decode_stats = DecodeStats()
+        self._stats = {
+            "requests": 0,
+            "shared": 0,
+            "not_modified": 0,
+            "unchanged": 0,
+            "bytes": 0,
+        }
+
+    @property
+    def stats(self) -> Dict[str, Any]:
+        """Return request counters and cache hit rates for the shared endpoints."""
+        stats = {**self._stats, "endpoints": len(self._endpoints)}
+        requests = stats["requests"]
+        # Responses served without downloading and decoding a new body
+        hits = stats["not_modified"] + stats["unchanged"]
+        stats["conditional_hit_rate"] = round(hits / requests, 3) if requests else None
+        fetches = requests + stats["shared"]
+        stats["shared_hit_rate"] = round(stats["shared"] / fetches, 3) if fetches else None
+        stats["decode"] = self.decode_stats.as_dict()
+        return stats
+
+    def endpoint(self, url: str) -> Optional[Dict[str, Any]]:
+        """Return the cached validators and data of an endpoint."""
+        return self._endpoints.get(url)
+
+    @callback
+    def async_seed(
+        self,
+        url: str,
+        language: str,
+        etag: Optional[str],
+        last_modified: Optional[str],
+        digest: bytes,
+        data: Dict[str, Any],
+    ) -> Dict[str, Any]:
+        """Seed an endpoint from a snapshot, returning the data to use.
+
+        An endpoint another entry already seeded or fetched is kept, so all
+        entries share its data.
+        """
+        endpoint = self._endpoints.get(url)
+        if endpoint is None:
+            endpoint = self._endpoints[url] = {
+                "etag": etag,
+                "last_modified": last_modified,
+                "digest": digest,
+                # The body is not in the snapshot, other languages need a
+                # full request
+                "body": None,
+                "fetched_at": None,
+                "data": {},
+            }
+        if endpoint["digest"] == digest:
+            return endpoint["data"].setdefault(language, data)
+        return data
+
+    @callback
+    def async_remove_consumer(self, consumer: str) -> None:
+        """Forget which responses a consumer, such as an unloaded entry, got."""
+        for key in [key for key in self._served if key[0] == consumer]:
+            del self._served[key]
+
+    async def async_fetch(
+        self,
+        url: str,
+        language: str,
+        consumer: Optional[str] = None,
+        max_age: float = 0,
+        timeout: float = DEFAULT_REQUEST_TIMEOUT,
+    ) -> Dict[str, Any]:
+        """Return the response of an endpoint projected to a language.
+
+        A response another entry fetched since the consumer was last served
+        this endpoint is reused if it is younger than max_age seconds,
+        normally the consumer's poll interval. timeout bounds the request
+        when one is needed. The request is shielded from the caller's
+        cancellation, so this is what frees the connection slot of a
+        stalled endpoint.
+        """
+        endpoint = self._endpoints.get(url)
+        if self._needs_request(url, endpoint, language, consumer, max_age):
+            # A restored endpoint has no body to decode, so a 304 cannot
+            # serve a language it was not restored in. Such a caller only
+            # joins an unconditional request.
+            unconditional = endpoint is not None and endpoint["body"] is None and (
+                language not in endpoint["data"]
+            )
+            task = self._inflight.get((url, True))
+            if task is None and not unconditional:
+                task = self._inflight.get((url, False))
+            if task is None:
+                key = (url, unconditional)
+                task = self._inflight[key] = self.hass.async_create_task(
+                    self._async_request(url, unconditional, timeout), f"{DOMAIN} fetch {url}"
+                )
+                task.add_done_callback(lambda _: self._inflight.pop(key, None))
+            else:
+                self._stats["shared"] += 1
+            # Shielded so an entry hitting its deadline does not cancel the
+            # request for the other entries waiting on it
+            endpoint = await asyncio.shield(task)
+        else:
+            self._stats["shared"] += 1
+
+        if consumer is not None:
+            self._served[(consumer, url)] = endpoint["fetched_at"]
+        data = endpoint["data"].get(language)
+        if data is None:
+            data = await self._async_decode(url, endpoint, language)
+        return data
+
+    def _needs_request(
+        self,
+        url: str,
+        endpoint: Optional[Dict[str, Any]],
+        language: str,
+        consumer: Optional[str],
+        max_age: float,
+    ) -> bool:
+        """Return True if the endpoint has to be requested again."""
+        if endpoint is None or endpoint["fetched_at"] is None:
+            return True
+        if endpoint["body"] is None and language not in endpoint["data"]:
+            return True
+        age = time.monotonic() - endpoint["fetched_at"]
+        if age <= self._max_age:
+            return False
+        # The consumer's own last response is never reused, only one that
+        # was fetched for another consumer since
+        served = self._served.get((consumer, url))
+        fetched_since = served is None or endpoint["fetched_at"] > served
+        return not (fetched_since and age < max_age)
+
+    async def _async_request(
+        self, url: str, unconditional: bool, timeout: float
+    ) -> Dict[str, Any]:
+        """Request an endpoint, returning its updated cache entry."""
+        _LOGGER.debug("Fetching data from %s", url)
+        cached = self._endpoints.get(url)
+
+        # Send the validators from the previous response so the API can
+        # answer 304 Not Modified
+        headers = {}
+        if cached and not unconditional:
+            if cached["etag"]:
+                headers["If-None-Match"] = cached["etag"]
+            if cached["last_modified"]:
+                headers["If-Modified-Since"] = cached["last_modified"]
+
+        self._stats["requests"] += 1
+        try:
+            async with self.client.request(
+                "GET", url, headers=headers, timeout=aiohttp.ClientTimeout(total=timeout)
+            ) as response:
+                if response.status == 304 and cached and not unconditional:
+                    _LOGGER.debug("Not modified: %s", url)
+                    self._stats["not_modified"] += 1
+                    cached["fetched_at"] = time.monotonic()
+                    return cached
+
+                if response.status in (429, 503):
+                    retry_after = parse_retry_after(response.headers.get("Retry-After"))
+                    raise VMARateLimitError(
+                        f"API asked to back off: {response.status}", retry_after
+                    )
+
+                if response.status != 200:
+                    _LOGGER.error("Error communicating with API: %s", response.status)
+                    raise UpdateFailed(f"Error communicating with API: {response.status}")
+
+                try:
+                    body = await async_read_body(response, MAX_RESPONSE_BYTES)
+                except PayloadTooLargeError:
+                    self.decode_stats.oversized += 1
+                    raise
+                self._stats["bytes"] += len(body)
+                digest = hashlib.blake2b(body, digest_size=16).digest()
+                etag = response.headers.get("ETag")
+                last_modified = response.headers.get("Last-Modified")
+        except aiohttp.ClientError as err:
+            _LOGGER.error("Error communicating with API: %s", err)
+            raise UpdateFailed(f"Error communicating with API: {err}") from err
+        except asyncio.TimeoutError as err:
+            _LOGGER.error("Timeout communicating with API: %s", err)
+            raise UpdateFailed(f"Timeout communicating with API: {err}") from err
+
+        # The API does not always send validators, so an identical body is
+        # treated the same way as a 304 and keeps the decoded data
+        if cached and cached["digest"] == digest:
+            _LOGGER.debug("Unchanged response body: %s", url)
+            self._stats["unchanged"] += 1
+            cached.update(etag=etag, last_modified=last_modified, body=body)
+            cached["fetched_at"] = time.monotonic()
+            return cached
+
+        endpoint = self._endpoints[url] = {
+            "etag": etag,
+            "last_modified": last_modified,
+            "digest": digest,
+            "body": body,
+            "fetched_at": time.monotonic(),
+            "data": {},
+        }
+        return endpoint
+
+    async def _async_decode(
+        self, url: str, endpoint: Dict[str, Any], language: str
+    ) -> Dict[str, Any]:
+        """Decode an endpoint's body for a language and cache the result."""
+        body = endpoint["body"]
+
+        # Large bodies are decoded in the executor so they do not block
+        # the event loop
+        offload = len(body) > DECODE_OFFLOAD_BYTES
+        if offload:
+            data, dropped, seconds = await self.hass.async_add_executor_job(
+                decode_alert_payload, body, language
+            )
+        else:
+            data, dropped, seconds = decode_alert_payload(body, language)
+        self.decode_stats.record(len(body), len(data["alerts"]), dropped, seconds, offload)
+
+        # Log the number of alerts
+        _LOGGER.debug(
+            "Received %d alerts from %s (%d bytes decoded in %.1f ms)",
+            len(data["alerts"]), url, len(body), seconds * 1000,
+        )
+
+        # Another entry may have decoded the same body while this one was
+        # in the executor
+        return endpoint["data"].setdefault(language, data)
@@ -0,0 +1,102 @@
+"""Refresh instrumentation for the Swedish VMA Alerts integration."""
+import math
+import time
+from collections import deque
+from contextlib import contextmanager
+from typing import Any, Deque, Dict, Optional
+
+# Samples kept per timing for the rolling percentiles
+DEFAULT_WINDOW = 200
+
+
+def _nearest_rank(ordered, percent: float) -> float:
+    """Return a percentile of sorted samples by the nearest-rank method."""
+    rank = math.ceil(percent / 100 * len(ordered))
+    return ordered[max(0, min(len(ordered), rank) - 1)]
+
+
+class RollingStats:
+    """Rolling percentiles over the most recent samples."""
+
+    __slots__ = ("_samples", "count", "total")
+
+    def __init__(self, window: int = DEFAULT_WINDOW):
+        """Initialize the window."""
+        self._samples: Deque[float] = deque(maxlen=window)
+        self.count = 0
+        self.total = 0.0
+
+    def add(self, value: float) -> None:
+        """Record a sample."""
+        self._samples.append(value)
+        self.count += 1
+        self.total += value
+
+    @property
+    def last(self) -> Optional[float]:
+        """Return the most recent sample."""
+        return self._samples[-1] if self._samples else None
+
+    def percentile(self, percent: float) -> Optional[float]:
+        """Return a percentile of the window."""
+        if not self._samples:
+            return None
+        return _nearest_rank(sorted(self._samples), percent)
+
+    def as_dict(self, scale: float = 1.0, digits: int = 3) -> Dict[str, Any]:
+        """Return the count, last value, mean and p50/p95/p99, multiplied by scale."""
+        if not self._samples:
+            return {"count": self.count}
+        ordered = sorted(self._samples)
+        return {
+            "count": self.count,
+            "last": round(self._samples[-1] * scale, digits),
+            "mean": round(self.total / self.count * scale, digits),
+            "p50": round(_nearest_rank(ordered, 50) * scale, digits),
+            "p95": round(_nearest_rank(ordered, 95) * scale, digits),
+            "p99": round(_nearest_rank(ordered, 99) * scale, digits),
+        }
+
+
+class RefreshMetrics:
+    """Per-phase timings and counters of a coordinator.
+
+    The coordinator times each phase of a refresh with timer(), and the
+    entities count their state writes, so diagnostics can show where
+    refresh time goes.
+    """
+
+    def __init__(self, window: int = DEFAULT_WINDOW):
+        """Initialize the metrics."""
+        self._window = window
+        self.timings: Dict[str, RollingStats] = {}
+        self.counters: Dict[str, int] = {}
+
+    @contextmanager
+    def timer(self, phase: str):
+        """Time the enclosed block as one sample of a phase."""
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.record(phase, time.perf_counter() - start)
+
+    def record(self, phase: str, seconds: float) -> None:
+        """Record the duration of a phase."""
+        stats = self.timings.get(phase)
+        if stats is None:
+            stats = self.timings[phase] = RollingStats(self._window)
+        stats.add(seconds)
+
+    def count(self, counter: str, amount: int = 1) -> None:
+        """Increment a counter."""
+        self.counters[counter] = self.counters.get(counter, 0) + amount
+
+    def as_dict(self) -> Dict[str, Any]:
+        """Return the counters and the timings in milliseconds."""
+        return {
+            "counters": dict(self.counters),
+            "timings_ms": {
+                phase: stats.as_dict(scale=1000) for phase, stats in self.timings.items()
+            },
+        }
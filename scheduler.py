@@ -0,0 +1,50 @@
+"""Adaptive polling for the Swedish VMA Alerts integration."""
+import random
+from typing import Optional
+
+BACKOFF_FACTOR = 2.0
+JITTER = 0.1
+
+
+class AdaptivePollScheduler:
+    """Choose the next poll interval from alert activity and API health.
+
+    The interval drops to the floor while alerts need attention, doubles
+    towards the ceiling while the feed is quiet or the API is failing, and
+    never undercuts a Retry-After from the API. Jitter keeps many Home
+    Assistant instances from polling in lockstep.
+    """
+
+    def __init__(self, floor: float, ceiling: float, jitter: float = JITTER):
+        """Initialize the scheduler."""
+        self.floor = floor
+        self.ceiling = max(floor, ceiling)
+        self._jitter = jitter
+        self.interval = floor
+
+    def next_interval(
+        self,
+        hot: bool = False,
+        failed: bool = False,
+        retry_after: Optional[float] = None,
+    ) -> float:
+        """Return the seconds until the next poll.
+
+        hot means there are active alerts or a recent Update message, failed
+        that the API returned errors.
+        """
+        if hot and not failed:
+            self.interval = self.floor
+        else:
+            # Back off while the feed is quiet or the API is struggling
+            self.interval = min(self.ceiling, self.interval * BACKOFF_FACTOR)
+
+        interval = self.interval * random.uniform(1 - self._jitter, 1 + self._jitter)
+        interval = min(self.ceiling, max(self.floor, interval))
+
+        if retry_after is not None and retry_after > interval:
+            # The API asked us to wait, even beyond the ceiling
+            self.interval = min(self.ceiling, retry_after)
+            interval = retry_after
+
+        return interval
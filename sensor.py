@@ -1,42 +1,46 @@
 """Sensor platform for Swedish VMA Alerts integration."""
 import logging
-from datetime import datetime
-from typing import Any, Dict, List, Optional
+from datetime import timedelta
+from typing import Dict, Set
 
-from homeassistant.components.sensor import SensorEntity
+from homeassistant.components.sensor import (
+    SensorDeviceClass,
+    SensorEntity,
+    SensorStateClass,
+)
 from homeassistant.config_entries import ConfigEntry
-from homeassistant.core import HomeAssistant
+from homeassistant.const import PERCENTAGE, UnitOfTime
+from homeassistant.core import HomeAssistant, callback
+from homeassistant.helpers import entity_registry as er
+from homeassistant.helpers.entity import EntityCategory
 from homeassistant.helpers.entity_platform import AddEntitiesCallback
 from homeassistant.helpers.update_coordinator import CoordinatorEntity
 
 from .const import (
     DOMAIN,
+    DATA_HUB,
     DEFAULT_NAME,
     CONF_LANGUAGE,
     CONF_SHOW_EXPIRED,
+    CONF_COMPACT_ATTRIBUTES,
     DEFAULT_LANGUAGE,
     DEFAULT_SHOW_EXPIRED,
-    ATTR_HEADLINE,
+    DEFAULT_COMPACT_ATTRIBUTES,
     ATTR_DESCRIPTION,
     ATTR_INSTRUCTION,
     ATTR_AREA,
-    ATTR_SENT,
-    ATTR_EFFECTIVE,
-    ATTR_EXPIRES,
-    ATTR_STATUS,
-    ATTR_MESSAGE_TYPE,
-    ATTR_SEVERITY,
-    ATTR_URGENCY,
-    ATTR_CERTAINTY,
-    ATTR_EVENT,
-    ATTR_SENDER_NAME,
+    ATTR_PARAMETERS,
     ATTR_WEB,
     ATTR_CONTACT,
-    ATTR_PARAMETERS,
+    ATTR_STALE,
+    ATTR_LAST_SUCCESS,
 )
 
 _LOGGER = logging.getLogger(__name__)
 
+# Only the diagnostic sensors poll, they read the coordinator's metrics
+SCAN_INTERVAL = timedelta(seconds=60)
+
 async def async_setup_entry(
     hass: HomeAssistant, entry: ConfigEntry, async_add_entities: AddEntitiesCallback
 ) -> None:
@@ -44,26 +48,95 @@ async def async_setup_entry(
     coordinator = hass.data[DOMAIN][entry.entry_id]
     
     language = entry.data.get(CONF_LANGUAGE, DEFAULT_LANGUAGE)
-    show_expired = entry.data.get(CONF_SHOW_EXPIRED, DEFAULT_SHOW_EXPIRED)
-    
-    # Create a list to hold our entities
-    entities = []
     
-    # Add the main sensor that shows the number of active alerts
-    entities.append(VMAAlertCountSensor(coordinator, entry, language))
+    # Add the main sensor that shows the number of active alerts, and the
+    # diagnostic sensors, which are disabled by default
+    async_add_entities(
+        [
+            VMAAlertCountSensor(coordinator, entry, language),
+            VMARefreshTimeSensor(hass, coordinator, entry),
+            VMAStateWritesSensor(hass, coordinator, entry),
+            VMACacheHitRateSensor(hass, coordinator, entry),
+        ],
+        True,
+    )
     
-    # Add individual alert sensors
-    if coordinator.data and "alerts" in coordinator.data:
-        for alert in coordinator.data["alerts"]:
+    # Individual alert sensors come and go with the alerts
+    manager = VMAAlertEntityManager(hass, coordinator, entry, language, async_add_entities)
+    manager.async_remove_orphans()
+    manager.async_update()
+    entry.async_on_unload(coordinator.async_add_listener(manager.async_update))
+
+
+class VMAAlertEntityManager:
+    """Add and remove alert sensors as alerts appear and disappear.
+
+    Each update diffs the wanted alert identifiers against the entities that
+    exist, so entity work is proportional to what changed. Changes to an
+    existing alert reach its sensor through the coordinator's alert listeners.
+    """
+
+    def __init__(self, hass, coordinator, entry, language, async_add_entities):
+        """Initialize the manager."""
+        self._hass = hass
+        self._coordinator = coordinator
+        self._entry = entry
+        self._language = language
+        self._async_add_entities = async_add_entities
+        self._show_expired = entry.data.get(CONF_SHOW_EXPIRED, DEFAULT_SHOW_EXPIRED)
+        self._entities: Dict[str, VMAAlertSensor] = {}
+
+    def _wanted_ids(self) -> Set[str]:
+        """Return the identifiers that should have a sensor."""
+        if not self._coordinator.data:
+            return set()
+        return {
+            alert.identifier
+            for alert in self._coordinator.data
             # Skip expired alerts if show_expired is False
-            if not show_expired:
-                expires = alert.get("info", [{}])[0].get("expires")
-                if expires and datetime.fromisoformat(expires.replace("Z", "+00:00")) < datetime.now():
-                    continue
-                    
-            entities.append(VMAAlertSensor(coordinator, entry, alert["identifier"], language))
-    
-    async_add_entities(entities, True)
+            if self._show_expired or not alert.expired
+        }
+
+    @callback
+    def async_remove_orphans(self) -> None:
+        """Remove alert sensors left in the registry by a previous run."""
+        registry = er.async_get(self._hass)
+        wanted = self._wanted_ids()
+        prefix = f"{self._entry.entry_id}_"
+        for registry_entry in er.async_entries_for_config_entry(registry, self._entry.entry_id):
+            if registry_entry.domain != "sensor" or not registry_entry.unique_id.startswith(prefix):
+                continue
+            alert_id = registry_entry.unique_id[len(prefix):]
+            if alert_id not in FIXED_SENSOR_KEYS and alert_id not in wanted:
+                registry.async_remove(registry_entry.entity_id)
+
+    @callback
+    def async_update(self) -> None:
+        """Add sensors for new alerts and remove those of vanished alerts."""
+        wanted = self._wanted_ids()
+        added = wanted - self._entities.keys()
+        removed = self._entities.keys() - wanted
+        
+        if added:
+            new_entities = [
+                VMAAlertSensor(self._coordinator, self._entry, alert_id, self._language)
+                for alert_id in added
+            ]
+            for entity in new_entities:
+                self._entities[entity.alert_id] = entity
+            self._async_add_entities(new_entities)
+            _LOGGER.debug("Added sensors for alerts: %s", ", ".join(sorted(added)))
+            
+        if removed:
+            registry = er.async_get(self._hass)
+            for alert_id in removed:
+                entity = self._entities.pop(alert_id)
+                if entity.entity_id and registry.async_get(entity.entity_id):
+                    # Removing the registry entry also removes the entity
+                    registry.async_remove(entity.entity_id)
+                elif entity.hass is not None:
+                    self._hass.async_create_task(entity.async_remove())
+            _LOGGER.debug("Removed sensors for alerts: %s", ", ".join(sorted(removed)))
 
 
 class VMAAlertCountSensor(CoordinatorEntity, SensorEntity):
@@ -77,44 +150,168 @@ class VMAAlertCountSensor(CoordinatorEntity, SensorEntity):
         self._attr_name = f"{DEFAULT_NAME} Count"
         self._attr_unique_id = f"{entry.entry_id}_count"
         self._attr_icon = "mdi:alert"
+        self._last_written = None
+        self._update_state()
 
-    @property
-    def native_value(self) -> int:
-        """Return the number of active alerts."""
-        if not self.coordinator.data or "alerts" not in self.coordinator.data:
-            return 0
+    def _update_state(self) -> None:
+        """Compute the state from the alert store."""
+        store = self.coordinator.data
+        if not store:
+            self._attr_native_value = 0
+            self._attr_extra_state_attributes = {"alerts": []}
+            return
             
         show_expired = self._entry.data.get(CONF_SHOW_EXPIRED, DEFAULT_SHOW_EXPIRED)
         
         if show_expired:
-            return len(self.coordinator.data["alerts"])
-        
-        # Count only non-expired alerts
-        count = 0
-        for alert in self.coordinator.data["alerts"]:
-            expires = alert.get("info", [{}])[0].get("expires")
-            if not expires or datetime.fromisoformat(expires.replace("Z", "+00:00")) >= datetime.now():
-                count += 1
-                
-        return count
+            self._attr_native_value = len(store)
+        else:
+            # Count only non-expired alerts
+            self._attr_native_value = sum(1 for alert in store if not alert.expired)
+        self._attr_extra_state_attributes = {
+            "alerts": store.ids,
+            ATTR_STALE: store.stale,
+            ATTR_LAST_SUCCESS: store.last_success.isoformat() if store.last_success else None,
+        }
 
-    @property
-    def extra_state_attributes(self) -> Dict[str, Any]:
-        """Return the state attributes."""
-        return {
-            "alerts": [alert["identifier"] for alert in self.coordinator.data.get("alerts", [])] if self.coordinator.data else []
+    @callback
+    def _handle_coordinator_update(self) -> None:
+        """Write the state only when the derived values changed."""
+        self._update_state()
+        written = (
+            self.available,
+            self._attr_native_value,
+            tuple(self._attr_extra_state_attributes["alerts"]),
+            self._attr_extra_state_attributes.get(ATTR_STALE),
+            self._attr_extra_state_attributes.get(ATTR_LAST_SUCCESS),
+        )
+        if written == self._last_written:
+            self.coordinator.metrics.count("skipped_writes")
+            return
+        self._last_written = written
+        self.coordinator.metrics.count("state_writes")
+        super()._handle_coordinator_update()
+
+
+class VMADiagnosticSensor(SensorEntity):
+    """Base class for sensors showing the coordinator's instrumentation."""
+
+    _attr_entity_category = EntityCategory.DIAGNOSTIC
+    _attr_entity_registry_enabled_default = False
+    _key: str
+    _label: str
+
+    def __init__(self, hass, coordinator, entry):
+        """Initialize the sensor."""
+        self.coordinator = coordinator
+        self._hub = hass.data[DOMAIN][DATA_HUB]
+        self._attr_name = f"{DEFAULT_NAME} {self._label}"
+        self._attr_unique_id = f"{entry.entry_id}_{self._key}"
+        self._attr_icon = "mdi:chart-line"
+
+
+class VMARefreshTimeSensor(VMADiagnosticSensor):
+    """Duration of the last refresh, with rolling percentiles."""
+
+    _key = "refresh_time"
+    _label = "Refresh Time"
+    _attr_device_class = SensorDeviceClass.DURATION
+    _attr_native_unit_of_measurement = UnitOfTime.MILLISECONDS
+    _attr_state_class = SensorStateClass.MEASUREMENT
+
+    async def async_update(self) -> None:
+        """Read the refresh timings."""
+        timings = self.coordinator.metrics.as_dict()["timings_ms"]
+        refresh = timings.get("refresh", {})
+        self._attr_native_value = refresh.get("last")
+        self._attr_extra_state_attributes = {
+            "p50": refresh.get("p50"),
+            "p95": refresh.get("p95"),
+            "p99": refresh.get("p99"),
+            "phases_p95": {
+                phase: stats.get("p95") for phase, stats in timings.items() if phase != "refresh"
+            },
         }
 
 
-class VMAAlertSensor(CoordinatorEntity, SensorEntity):
-    """Sensor for individual VMA alerts."""
+class VMAStateWritesSensor(VMADiagnosticSensor):
+    """Number of state writes by this entry's entities."""
+
+    _key = "state_writes"
+    _label = "State Writes"
+    _attr_state_class = SensorStateClass.TOTAL_INCREASING
+
+    async def async_update(self) -> None:
+        """Read the write counters."""
+        counters = self.coordinator.metrics.counters
+        self._attr_native_value = counters.get("state_writes", 0)
+        self._attr_extra_state_attributes = {
+            "skipped_writes": counters.get("skipped_writes", 0),
+            "refreshes": counters.get("refreshes", 0),
+            "unchanged_refreshes": counters.get("unchanged_refreshes", 0),
+        }
+
+
+class VMACacheHitRateSensor(VMADiagnosticSensor):
+    """Share of API requests answered without a new body."""
+
+    _key = "cache_hit_rate"
+    _label = "Cache Hit Rate"
+    _attr_native_unit_of_measurement = PERCENTAGE
+    _attr_state_class = SensorStateClass.MEASUREMENT
+
+    async def async_update(self) -> None:
+        """Read the fetch hub counters."""
+        stats = self._hub.stats
+        rate = stats["conditional_hit_rate"]
+        self._attr_native_value = round(rate * 100, 1) if rate is not None else None
+        self._attr_extra_state_attributes = {
+            "requests": stats["requests"],
+            "shared_hit_rate": stats["shared_hit_rate"],
+            "bytes": stats["bytes"],
+            "dropped_alerts": stats["decode"]["dropped_alerts"],
+        }
+
+
+# Sensors of an entry that are not alert sensors
+FIXED_SENSOR_KEYS = {
+    "count",
+    VMARefreshTimeSensor._key,
+    VMAStateWritesSensor._key,
+    VMACacheHitRateSensor._key,
+}
+
+
+class VMAAlertSensor(SensorEntity):
+    """Sensor for individual VMA alerts.
+
+    The sensor subscribes to its own alert on the coordinator instead of to
+    every coordinator update, so it is only woken when its alert changes.
+    With compact attributes enabled it only shows a summary, and the full
+    text is read from the coordinator's alert store by get_alert_details.
+    """
+
+    _attr_should_poll = False
+    # The long texts are already in the alert store, keep them out of the
+    # recorder database
+    _unrecorded_attributes = frozenset(
+        {
+            ATTR_DESCRIPTION,
+            ATTR_INSTRUCTION,
+            ATTR_AREA,
+            ATTR_PARAMETERS,
+            ATTR_WEB,
+            ATTR_CONTACT,
+        }
+    )
 
     def __init__(self, coordinator, entry, alert_id, language):
         """Initialize the sensor."""
-        super().__init__(coordinator)
+        self.coordinator = coordinator
         self._entry = entry
         self._alert_id = alert_id
         self._language = language
+        self._compact = entry.data.get(CONF_COMPACT_ATTRIBUTES, DEFAULT_COMPACT_ATTRIBUTES)
         self._attr_unique_id = f"{entry.entry_id}_{alert_id}"
         self._attr_entity_id = f"sensor.{alert_id.lower()}"
         self._attr_icon = "mdi:alert-octagon"
@@ -122,119 +319,45 @@ class VMAAlertSensor(CoordinatorEntity, SensorEntity):
         # Set initial state
         self._update_attributes()
 
+    @property
+    def alert_id(self) -> str:
+        """Return the identifier of the alert."""
+        return self._alert_id
+
     def _update_attributes(self) -> None:
         """Update the sensor attributes based on the alert data."""
-        if not self.coordinator.data or "alerts" not in self.coordinator.data:
-            self._attr_native_value = "Unknown"
-            self._attr_extra_state_attributes = {}
-            return
-            
-        # Find the alert with matching ID
-        alert = None
-        for a in self.coordinator.data["alerts"]:
-            if not a or not isinstance(a, dict):
-                continue
-                
-            if "identifier" in a and a["identifier"] == self._alert_id:
-                alert = a
-                break
+        alert = self.coordinator.data.get(self._alert_id) if self.coordinator.data else None
                 
         if not alert:
             self._attr_native_value = "Unknown"
             self._attr_extra_state_attributes = {}
             return
             
-        # Get the info in the preferred language, or the first info if not available
-        info = None
-        info_list = alert.get("info", [])
-        
-        # Handle the case where info is None (Cancel messages)
-        if info_list is None:
-            self._attr_name = f"Alert {self._alert_id}"
-            self._attr_native_value = "Canceled"
-            
-            # Set basic attributes for cancel messages
-            self._attr_extra_state_attributes = {
-                ATTR_STATUS: alert.get("status"),
-                ATTR_MESSAGE_TYPE: alert.get("msgType"),
-                ATTR_SENT: alert.get("sent"),
-                ATTR_EVENT: "Alert Canceled",
-            }
-            return
-            
-        if not isinstance(info_list, list) or len(info_list) == 0:
-            self._attr_native_value = "Unknown"
-            self._attr_extra_state_attributes = {}
-            return
-            
-        for i in info_list:
-            if not i or not isinstance(i, dict):
-                continue
-                
-            if "language" in i and i["language"] == self._language:
-                info = i
-                break
-                
-        if not info and info_list:
-            # Get the first valid info object
-            for i in info_list:
-                if i and isinstance(i, dict):
-                    info = i
-                    break
-            
-        if not info:
-            self._attr_native_value = "Unknown"
-            self._attr_extra_state_attributes = {}
-            return
-            
-        # Set the sensor name and state
-        headline = info.get("headline")
-        if headline:
-            self._attr_name = headline
-        else:
-            event = info.get("event")
-            if event:
-                self._attr_name = f"{event} - {self._alert_id}"
-            else:
-                self._attr_name = f"Alert {self._alert_id}"
-                
-        severity = info.get("severity")
-        if severity:
-            self._attr_native_value = severity
+        if alert.name:
+            self._attr_name = alert.name
+        self._attr_native_value = alert.state
+        if self._compact:
+            self._attr_extra_state_attributes = alert.summary_attributes
         else:
-            self._attr_native_value = "Unknown"
-        
-        # Set attributes
-        attributes = {
-            ATTR_HEADLINE: info.get("headline"),
-            ATTR_DESCRIPTION: info.get("description"),
-            ATTR_INSTRUCTION: info.get("instruction"),
-            ATTR_AREA: [area.get("areaDesc") for area in info.get("area", []) if area and isinstance(area, dict)],
-            ATTR_SENT: alert.get("sent"),
-            ATTR_EFFECTIVE: info.get("effective"),
-            ATTR_EXPIRES: info.get("expires"),
-            ATTR_STATUS: alert.get("status"),
-            ATTR_MESSAGE_TYPE: alert.get("msgType"),
-            ATTR_SEVERITY: info.get("severity"),
-            ATTR_URGENCY: info.get("urgency"),
-            ATTR_CERTAINTY: info.get("certainty"),
-            ATTR_EVENT: info.get("event"),
-            ATTR_SENDER_NAME: alert.get("sender", {}).get("name") if alert.get("sender") and isinstance(alert.get("sender"), dict) else None,
-            ATTR_WEB: info.get("web"),
-            ATTR_CONTACT: info.get("contact"),
-        }
-        
-        # Add parameters if available
-        if info and "parameter" in info and isinstance(info["parameter"], list):
-            parameters = {}
-            for param in info["parameter"]:
-                if param and isinstance(param, dict) and "valueName" in param and "value" in param:
-                    parameters[param["valueName"]] = param["value"]
-            attributes[ATTR_PARAMETERS] = parameters
-            
-        self._attr_extra_state_attributes = attributes
+            self._attr_extra_state_attributes = alert.attributes
+
+    @property
+    def available(self) -> bool:
+        """Return True if the last update was successful."""
+        return self.coordinator.last_update_success
+
+    async def async_added_to_hass(self) -> None:
+        """Subscribe to updates for this alert."""
+        await super().async_added_to_hass()
+        self.async_on_remove(
+            self.coordinator.async_add_alert_listener(
+                self._alert_id, self._handle_coordinator_update
+            )
+        )
 
+    @callback
     def _handle_coordinator_update(self) -> None:
         """Handle updated data from the coordinator."""
         self._update_attributes()
-        super()._handle_coordinator_update() 
\ No newline at end of file
+        self.coordinator.metrics.count("state_writes")
+        self.async_write_ha_state() 
\ No newline at end of file
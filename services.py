@@ -1,19 +1,44 @@
 """Services for the Swedish VMA Alerts integration."""
 import logging
 import json
-import aiohttp
-from typing import Any, Dict
+from typing import Any, Dict, Optional
 
 import voluptuous as vol
 
-from homeassistant.core import HomeAssistant, ServiceCall
+from homeassistant.core import HomeAssistant, ServiceCall, ServiceResponse, SupportsResponse
+from homeassistant.exceptions import HomeAssistantError
 from homeassistant.helpers import config_validation as cv
 from homeassistant.helpers.entity_component import EntityComponent
+from homeassistant.helpers.update_coordinator import DataUpdateCoordinator
+from homeassistant.util import dt as dt_util
 
-from .const import DOMAIN
+from .const import DOMAIN, DATA_WEBHOOKS, CONF_SHOW_EXPIRED, DEFAULT_SHOW_EXPIRED
+from .webhook import PAYLOAD_ALERT, PAYLOAD_ALERTS
 
 _LOGGER = logging.getLogger(__name__)
 
+def _coordinators(hass: HomeAssistant):
+    """Yield the coordinator of every loaded entry that has data."""
+    for coordinator in hass.data.get(DOMAIN, {}).values():
+        if isinstance(coordinator, DataUpdateCoordinator) and coordinator.data:
+            yield coordinator
+
+
+def _alert_stores(hass: HomeAssistant):
+    """Yield the alert store of every loaded entry."""
+    for coordinator in _coordinators(hass):
+        yield coordinator.data
+
+
+def _get_alert_details(hass: HomeAssistant, alert_id: str) -> Optional[Dict[str, Any]]:
+    """Return the details of an alert from the coordinators' alert stores."""
+    for store in _alert_stores(hass):
+        alert = store.get(alert_id)
+        if alert is not None:
+            return alert.details
+            
+    return None
+
 async def async_setup_services(hass: HomeAssistant) -> None:
     """Set up services for VMA Alerts integration."""
     component = EntityComponent(_LOGGER, DOMAIN, hass)
@@ -34,31 +59,50 @@ async def async_setup_services(hass: HomeAssistant) -> None:
             
         _LOGGER.debug("VMA alerts data refreshed")
 
-    async def async_get_alert_details_service(service_call: ServiceCall) -> None:
+    async def async_get_alert_details_service(service_call: ServiceCall) -> ServiceResponse:
         """Service to get detailed information about a specific alert."""
         alert_id = service_call.data.get("alert_id")
         
         if not alert_id:
             _LOGGER.error("No alert_id provided to get_alert_details service")
-            return
+            return None
             
-        # Find the alert entity
-        alert_entity_id = f"sensor.{alert_id}"
-        alert_entity = hass.states.get(alert_entity_id)
+        alert_data = _get_alert_details(hass, alert_id)
         
-        if not alert_entity:
-            _LOGGER.error(f"Alert entity {alert_entity_id} not found")
-            return
-            
-        # Return the alert details as an event
-        alert_data = {
-            "id": alert_id,
-            "state": alert_entity.state,
-            **alert_entity.attributes
-        }
+        if not alert_data:
+            if service_call.return_response:
+                raise HomeAssistantError(f"Alert {alert_id} not found")
+            _LOGGER.error(f"Alert {alert_id} not found")
+            return None
         
+        # Callers that ask for a response get the details directly,
+        # others still get them as an event
+        if service_call.return_response:
+            return alert_data
+            
         hass.bus.async_fire(f"{DOMAIN}_alert_details", alert_data)
         _LOGGER.debug(f"Fired event with details for alert {alert_id}")
+        return None
+
+    async def async_list_alerts_service(service_call: ServiceCall) -> ServiceResponse:
+        """Service to list the alerts matching the given filters."""
+        active_at = service_call.data.get("active_at")
+        if active_at is not None:
+            active_at = dt_util.as_utc(active_at)
+        
+        alerts = {}
+        for store in _alert_stores(hass):
+            for alert in store.query(
+                severities=service_call.data.get("severity"),
+                geocodes=service_call.data.get("geocode"),
+                statuses=service_call.data.get("status"),
+                msg_types=service_call.data.get("msg_type"),
+                active_at=active_at,
+            ):
+                # Entries with overlapping areas share alerts
+                alerts.setdefault(alert.identifier, alert.details)
+        
+        return {"alerts": list(alerts.values()), "count": len(alerts)}
 
     async def async_webhook_alert_service(service_call: ServiceCall) -> None:
         """Service to send alert data to a webhook endpoint."""
@@ -70,66 +114,39 @@ async def async_setup_services(hass: HomeAssistant) -> None:
             _LOGGER.error("No webhook_url provided to webhook_alert service")
             return
             
-        # Prepare data to send
-        data_to_send = {}
-        
+        # Payloads are assembled from the alert stores' serialized alerts
         if alert_id:
             # Send specific alert
-            alert_entity_id = f"sensor.{alert_id}"
-            alert_entity = hass.states.get(alert_entity_id)
+            body = None
+            for store in _alert_stores(hass):
+                alert = store.get(alert_id)
+                if alert is not None:
+                    body = store.details_json(alert)
+                    break
             
-            if not alert_entity:
-                _LOGGER.error(f"Alert entity {alert_entity_id} not found")
+            if body is None:
+                _LOGGER.error(f"Alert {alert_id} not found")
                 return
-                
-            data_to_send = {
-                "id": alert_id,
-                "state": alert_entity.state,
-                **alert_entity.attributes
-            }
+            shape, bodies = PAYLOAD_ALERT, [body]
         elif include_all:
-            # Send all active alerts
-            binary_sensor = hass.states.get("binary_sensor.vma_alerts_active")
-            if not binary_sensor:
-                _LOGGER.error("VMA Alerts binary sensor not found")
-                return
-                
-            alert_ids = binary_sensor.attributes.get("alert_ids", [])
-            alerts = []
-            
-            for aid in alert_ids:
-                alert_entity_id = f"sensor.{aid}"
-                alert_entity = hass.states.get(alert_entity_id)
-                
-                if alert_entity:
-                    alerts.append({
-                        "id": aid,
-                        "state": alert_entity.state,
-                        **alert_entity.attributes
-                    })
+            # Send all active alerts, as each entry's binary sensor counts them
+            bodies = {}
+            for coordinator in _coordinators(hass):
+                show_expired = coordinator.entry.data.get(CONF_SHOW_EXPIRED, DEFAULT_SHOW_EXPIRED)
+                store = coordinator.data
+                for alert in store.active_alerts(show_expired):
+                    if alert.identifier not in bodies:
+                        bodies[alert.identifier] = store.details_json(alert)
             
-            data_to_send = {
-                "alerts": alerts,
-                "count": len(alerts)
-            }
+            shape, bodies = PAYLOAD_ALERTS, list(bodies.values())
         else:
             _LOGGER.error("Either alert_id or include_all must be provided")
             return
             
-        # Send data to webhook
-        try:
-            async with aiohttp.ClientSession() as session:
-                async with session.post(
-                    webhook_url, 
-                    json=data_to_send,
-                    headers={"Content-Type": "application/json"}
-                ) as response:
-                    if response.status < 200 or response.status >= 300:
-                        _LOGGER.error(f"Error sending to webhook: {response.status}")
-                    else:
-                        _LOGGER.debug(f"Successfully sent alert data to webhook")
-        except Exception as e:
-            _LOGGER.error(f"Failed to send data to webhook: {e}")
+        # Delivery, batching and retries happen in the background
+        hass.data[DOMAIN][DATA_WEBHOOKS].async_enqueue(
+            webhook_url, shape, {PAYLOAD_ALERTS: bodies}
+        )
 
     hass.services.async_register(
         DOMAIN, "refresh", async_refresh_service, schema=vol.Schema({
@@ -140,7 +157,19 @@ async def async_setup_services(hass: HomeAssistant) -> None:
     hass.services.async_register(
         DOMAIN, "get_alert_details", async_get_alert_details_service, schema=vol.Schema({
             vol.Required("alert_id"): cv.string,
-        })
+        }),
+        supports_response=SupportsResponse.OPTIONAL,
+    )
+    
+    hass.services.async_register(
+        DOMAIN, "list_alerts", async_list_alerts_service, schema=vol.Schema({
+            vol.Optional("severity"): vol.All(cv.ensure_list, [cv.string]),
+            vol.Optional("geocode"): vol.All(cv.ensure_list, [cv.string]),
+            vol.Optional("status"): vol.All(cv.ensure_list, [cv.string]),
+            vol.Optional("msg_type"): vol.All(cv.ensure_list, [cv.string]),
+            vol.Optional("active_at"): cv.datetime,
+        }),
+        supports_response=SupportsResponse.ONLY,
     )
     
     hass.services.async_register(
@@ -158,6 +187,9 @@ async def async_unload_services(hass: HomeAssistant) -> None:
     
     if hass.services.has_service(DOMAIN, "get_alert_details"):
         hass.services.async_remove(DOMAIN, "get_alert_details")
+    
+    if hass.services.has_service(DOMAIN, "list_alerts"):
+        hass.services.async_remove(DOMAIN, "list_alerts")
         
     if hass.services.has_service(DOMAIN, "webhook_alert"):
         hass.services.async_remove(DOMAIN, "webhook_alert") 
\ No newline at end of file
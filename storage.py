@@ -0,0 +1,59 @@
+"""Persistent alert snapshot for the Swedish VMA Alerts integration."""
+import logging
+from typing import Any, Callable, Dict, Optional
+
+from homeassistant.core import HomeAssistant, callback
+from homeassistant.helpers.storage import Store
+
+from .const import DOMAIN
+
+_LOGGER = logging.getLogger(__name__)
+
+STORAGE_VERSION = 1
+STORAGE_SAVE_DELAY = 15  # seconds
+
+
+class VMASnapshotStore:
+    """Save and load the last alert snapshot of a config entry.
+
+    The snapshot lets entities come up from the cache right after a restart
+    and keeps already seen alerts from being fired as new again. Saves are
+    debounced so a burst of refreshes results in a single disk write.
+    """
+
+    def __init__(self, hass: HomeAssistant, entry_id: str):
+        """Initialize the store."""
+        self._store = Store(hass, STORAGE_VERSION, f"{DOMAIN}.{entry_id}")
+        self._pending: Optional[Callable[[], Dict[str, Any]]] = None
+
+    async def async_load(self) -> Optional[Dict[str, Any]]:
+        """Load the snapshot, or None if there is none."""
+        try:
+            return await self._store.async_load()
+        except Exception as err:  # pylint: disable=broad-except
+            _LOGGER.warning("Could not load the VMA alert snapshot: %s", err)
+            return None
+
+    def async_schedule_save(self, data_func: Callable[[], Dict[str, Any]]) -> None:
+        """Save the snapshot after the debounce delay."""
+        self._pending = data_func
+        self._store.async_delay_save(self._pending_data, STORAGE_SAVE_DELAY)
+
+    @callback
+    def _pending_data(self) -> Dict[str, Any]:
+        """Return the data of the pending save."""
+        data_func, self._pending = self._pending, None
+        return data_func()
+
+    async def async_flush(self) -> None:
+        """Write a pending save now, cancelling the delayed write.
+
+        Called on unload so a delayed write cannot recreate the file after
+        the entry is removed.
+        """
+        if self._pending is not None:
+            await self._store.async_save(self._pending_data())
+
+    async def async_remove(self) -> None:
+        """Remove the snapshot from disk."""
+        await self._store.async_remove()
@@ -0,0 +1,66 @@
+"""Fixtures for the Swedish VMA Alerts tests.
+
+The integration directory is imported as the vma_alerts package, and each
+test gets a bare Home Assistant instance in a temporary config directory.
+"""
+import importlib.util
+import sys
+from pathlib import Path
+from unittest.mock import MagicMock
+
+import pytest_asyncio
+
+# homeassistant.core has to be imported before the loader
+from homeassistant.core import HomeAssistant
+from homeassistant.config_entries import ConfigEntry
+
+INTEGRATION_DIR = Path(__file__).resolve().parent.parent
+PACKAGE = "vma_alerts"
+
+
+def _load_integration():
+    """Import the integration directory as a package."""
+    if PACKAGE not in sys.modules:
+        spec = importlib.util.spec_from_file_location(
+            PACKAGE,
+            INTEGRATION_DIR / "__init__.py",
+            submodule_search_locations=[str(INTEGRATION_DIR)],
+        )
+        module = importlib.util.module_from_spec(spec)
+        sys.modules[PACKAGE] = module
+        spec.loader.exec_module(module)
+    return sys.modules[PACKAGE]
+
+
+integration = _load_integration()
+
+
+@pytest_asyncio.fixture
+async def hass(tmp_path):
+    """Return a Home Assistant instance without any integration set up."""
+    hass = HomeAssistant(str(tmp_path))
+    hass.config.latitude, hass.config.longitude = 59.33, 18.07
+    yield hass
+    await hass.async_stop(force=True)
+
+
+@pytest_asyncio.fixture
+async def make_coordinator(hass):
+    """Return a factory for coordinators of entries with the given data.
+
+    The fetch hub is a mock, tests replace _fetch_data_for_geocode instead.
+    """
+    hass.data.setdefault(integration.DOMAIN, {})[integration.DATA_HUB] = MagicMock()
+
+    def _make(**data):
+        entry = ConfigEntry(
+            version=1,
+            minor_version=1,
+            domain=integration.DOMAIN,
+            title="VMA",
+            data=data,
+            source="user",
+        )
+        return integration.VMADataUpdateCoordinator(hass, entry)
+
+    return _make
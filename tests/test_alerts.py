@@ -0,0 +1,24 @@
+"""Tests for merging the per-geocode responses."""
+from conftest import integration
+
+merge_responses = integration.alerts.merge_responses
+
+
+def _alert(identifier, *codes):
+    """Return an alert with one area listing the given geocodes."""
+    return {
+        "identifier": identifier,
+        "info": [{"area": [{"geocode": [{"value": code} for code in codes]}]}],
+    }
+
+
+def test_folded_kommuner_match_only_their_own_areas():
+    """A kommun area listing its län does not match the län's other kommuner."""
+    responses = {
+        "01": {"alerts": [_alert("kommun", "0114", "01"), _alert("län", "01")]},
+    }
+
+    _, matched, _ = merge_responses(responses, {"01": ("01", "0114", "0180")})
+
+    assert matched["kommun"] == {"01", "0114"}
+    assert matched["län"] == {"01", "0114", "0180"}
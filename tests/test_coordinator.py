@@ -0,0 +1,69 @@
+"""Tests for the polling tiers of the VMA coordinator."""
+from datetime import timedelta
+from unittest.mock import patch
+
+import pytest
+from aiohttp import ClientError
+
+from homeassistant.util import dt as dt_util
+
+from conftest import integration
+
+pytestmark = pytest.mark.asyncio
+
+TIERS = {integration.TIER_PRIORITY, integration.TIER_REGIONAL, integration.TIER_NATIONAL}
+
+
+async def test_quiet_feed_tiers_stay_within_ceiling(make_coordinator):
+    """A quiet feed backs every tier off to the ceiling but not past it."""
+    coordinator = make_coordinator(
+        geocodes=["0114", "0180"],
+        priority_geocodes=["0180"],
+        scan_interval_min=30,
+        scan_interval_max=300,
+    )
+
+    for _ in range(10):
+        coordinator._adapt_interval(None, TIERS)
+    latest_due = dt_util.utcnow() + timedelta(seconds=300)
+
+    assert coordinator._tier_interval[integration.TIER_REGIONAL] == 300
+    assert coordinator._tier_interval[integration.TIER_NATIONAL] == 300
+    assert all(interval <= 300 for interval in coordinator._tier_interval.values())
+    assert all(due <= latest_due for due in coordinator._tier_due.values())
+
+
+async def test_failed_tier_stays_stale_until_fetched(make_coordinator):
+    """A failed geocode stays stale through refreshes that skip its tier."""
+    coordinator = make_coordinator(geocodes=["0114", "0180"], priority_geocodes=["0180"])
+    failing = set()
+    fetched = []
+
+    async def _fetch(geocode=None):
+        fetched.append(geocode)
+        if geocode in failing:
+            raise ClientError("Service unavailable")
+        return {"timestamp": dt_util.utcnow().isoformat(), "alerts": []}
+
+    with patch.object(coordinator, "_fetch_data_for_geocode", _fetch):
+        await coordinator.async_refresh()
+        failing.add("0114")
+        await coordinator.async_refresh()
+        assert coordinator.data.stale_geocodes == {"0114"}
+        failed_at = coordinator.data.last_success
+        assert failed_at is not None
+
+        # Only the priority tier is due, the regional 0114 is not polled
+        failing.clear()
+        coordinator._tier_due[integration.TIER_PRIORITY] = dt_util.utcnow()
+        fetched.clear()
+        await coordinator._async_refresh(scheduled=True)
+        assert fetched == ["0180"]
+        assert coordinator.failed_geocodes == {"0114"}
+        assert coordinator.data.stale_geocodes == {"0114"}
+        assert coordinator.data.last_success == failed_at
+
+        await coordinator.async_refresh()
+        assert not coordinator.failed_geocodes
+        assert not coordinator.data.stale_geocodes
+        assert coordinator.data.last_success is None
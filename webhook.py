@@ -0,0 +1,230 @@
+"""Webhook delivery for the Swedish VMA Alerts integration."""
+import asyncio
+import logging
+import time
+from collections import deque
+from typing import Any, Deque, Dict, List, Optional, Set, Tuple
+
+import aiohttp
+
+from homeassistant.core import HomeAssistant, callback
+
+from .api import VMAHttpClient
+from .const import (
+    DOMAIN,
+    DEFAULT_WEBHOOK_QUEUE_SIZE,
+    DEFAULT_WEBHOOK_CONCURRENCY,
+    DEFAULT_WEBHOOK_TIMEOUT,
+    DEFAULT_WEBHOOK_ATTEMPTS,
+)
+
+_LOGGER = logging.getLogger(__name__)
+
+# Seconds to wait for more payloads before sending a batch
+BATCH_WINDOW = 0.5
+# Delay before the first retry, doubled for every further attempt
+RETRY_BACKOFF = 2.0
+
+JSON_HEADERS = {"Content-Type": "application/json"}
+
+# Payload shapes. Queued payloads of the same kind for a URL are merged, so
+# a receiver gets the same shape whether or not deliveries were batched.
+PAYLOAD_ALERT = "alert"  # a single alert object
+PAYLOAD_ALERTS = "alerts"  # {"alerts": [...], "count": n}
+PAYLOAD_CHANGES = "changes"  # {"event": "alerts_changed", "added": [...], ...}
+
+
+def alerts_payload(bodies: List[bytes]) -> bytes:
+    """Return an alert list payload from already serialized alerts."""
+    return b'{"alerts":[%s],"count":%d}' % (b",".join(bodies), len(bodies))
+
+
+def changes_payload(changes: Dict[str, List[bytes]]) -> bytes:
+    """Return an alerts changed payload from already serialized alerts."""
+    parts = [b'"event":"alerts_changed"']
+    parts.extend(
+        b'"%s":[%s]' % (kind.encode(), b",".join(bodies)) for kind, bodies in changes.items()
+    )
+    return b"{%s}" % b",".join(parts)
+
+
+def build_payload(shape: str, parts: Dict[str, List[bytes]]) -> bytes:
+    """Return the JSON body of a payload from its serialized alerts."""
+    if shape == PAYLOAD_CHANGES:
+        return changes_payload(parts)
+    bodies = parts[PAYLOAD_ALERTS]
+    if shape == PAYLOAD_ALERT and len(bodies) == 1:
+        return bodies[0]
+    return alerts_payload(bodies)
+
+
+def merge_payloads(batch: List[Tuple[str, Dict[str, List[bytes]], float]]) -> bytes:
+    """Return one payload holding the alerts of a batch of the same kind.
+
+    Single alerts and alert lists become one alert list, and alert changes
+    are merged per kind of change. Alerts queued more than once are sent
+    once.
+    """
+    if len(batch) == 1:
+        shape, parts, _ = batch[0]
+        return build_payload(shape, parts)
+    merged: Dict[str, List[bytes]] = {}
+    for _, parts, _ in batch:
+        for kind, bodies in parts.items():
+            merged.setdefault(kind, []).extend(bodies)
+    shape = PAYLOAD_CHANGES if batch[0][0] == PAYLOAD_CHANGES else PAYLOAD_ALERTS
+    return build_payload(
+        shape, {kind: list(dict.fromkeys(bodies)) for kind, bodies in merged.items()}
+    )
+
+
+class WebhookDispatcher:
+    """Deliver webhook payloads in the background.
+
+    Payloads are queued as serialized alerts by the services and the
+    coordinator and sent by a single worker. Payloads of the same kind for
+    the same URL that are queued close together are merged into one, each
+    URL has its own concurrency limit, and failed deliveries are retried
+    with exponential backoff. When the queue is full new payloads are
+    dropped and counted instead of piling up.
+    """
+
+    def __init__(
+        self,
+        hass: HomeAssistant,
+        client: VMAHttpClient,
+        max_queue: int = DEFAULT_WEBHOOK_QUEUE_SIZE,
+        limit_per_url: int = DEFAULT_WEBHOOK_CONCURRENCY,
+        timeout: float = DEFAULT_WEBHOOK_TIMEOUT,
+        max_attempts: int = DEFAULT_WEBHOOK_ATTEMPTS,
+    ):
+        """Initialize the dispatcher."""
+        self.hass = hass
+        self._client = client
+        self._queue: asyncio.Queue = asyncio.Queue(max_queue)
+        self._limit_per_url = limit_per_url
+        self._url_limits: Dict[str, asyncio.Semaphore] = {}
+        self._timeout = aiohttp.ClientTimeout(total=timeout)
+        self._max_attempts = max_attempts
+        self._worker: Optional[asyncio.Task] = None
+        self._deliveries: Set[asyncio.Task] = set()
+        self._latencies: Deque[float] = deque(maxlen=100)
+        self._stats = {
+            "queued": 0,
+            "delivered": 0,
+            "batches": 0,
+            "retries": 0,
+            "failed": 0,
+            "dropped": 0,
+        }
+
+    @callback
+    def async_start(self) -> None:
+        """Start the delivery worker."""
+        if self._worker is None:
+            self._worker = self.hass.async_create_background_task(
+                self._async_run(), f"{DOMAIN} webhook dispatcher"
+            )
+
+    async def async_stop(self) -> None:
+        """Stop the worker and cancel the deliveries in progress."""
+        tasks = [*self._deliveries]
+        if self._worker is not None:
+            tasks.append(self._worker)
+            self._worker = None
+        for task in tasks:
+            task.cancel()
+        await asyncio.gather(*tasks, return_exceptions=True)
+        if not self._queue.empty():
+            _LOGGER.debug("Discarding %d queued webhook payloads", self._queue.qsize())
+
+    @callback
+    def async_enqueue(self, url: str, shape: str, parts: Dict[str, List[bytes]]) -> bool:
+        """Queue a payload for delivery, returning False if it was dropped.
+
+        parts maps "alerts", or each kind of change, to serialized alerts.
+        """
+        try:
+            self._queue.put_nowait((url, shape, parts, time.monotonic()))
+        except asyncio.QueueFull:
+            self._stats["dropped"] += 1
+            _LOGGER.warning("Webhook queue is full, dropping payload for %s", url)
+            return False
+        self._stats["queued"] += 1
+        return True
+
+    @property
+    def stats(self) -> Dict[str, Any]:
+        """Return the delivery counters and latencies in milliseconds."""
+        stats = dict(self._stats)
+        stats["queue_depth"] = self._queue.qsize()
+        stats["in_flight"] = len(self._deliveries)
+        latencies = self._latencies
+        stats["latency_last_ms"] = round(latencies[-1] * 1000, 1) if latencies else None
+        stats["latency_max_ms"] = round(max(latencies) * 1000, 1) if latencies else None
+        stats["latency_mean_ms"] = (
+            round(sum(latencies) / len(latencies) * 1000, 1) if latencies else None
+        )
+        return stats
+
+    async def _async_run(self) -> None:
+        """Group queued payloads by URL and start their deliveries."""
+        while True:
+            items = [await self._queue.get()]
+            # Give payloads queued in the same burst a chance to join the batch
+            await asyncio.sleep(BATCH_WINDOW)
+            while not self._queue.empty():
+                items.append(self._queue.get_nowait())
+
+            batches: Dict[Tuple[str, bool], List[Tuple[str, Dict[str, List[bytes]], float]]] = {}
+            for url, shape, parts, queued_at in items:
+                key = (url, shape == PAYLOAD_CHANGES)
+                batches.setdefault(key, []).append((shape, parts, queued_at))
+
+            for (url, _), batch in batches.items():
+                task = self.hass.async_create_background_task(
+                    self._async_deliver(url, batch), f"{DOMAIN} webhook delivery"
+                )
+                self._deliveries.add(task)
+                task.add_done_callback(self._deliveries.discard)
+
+    async def _async_deliver(
+        self, url: str, batch: List[Tuple[str, Dict[str, List[bytes]], float]]
+    ) -> None:
+        """Send a batch to a URL, retrying transient failures."""
+        payload = merge_payloads(batch)
+
+        limit = self._url_limits.get(url)
+        if limit is None:
+            limit = self._url_limits[url] = asyncio.Semaphore(self._limit_per_url)
+
+        error: Any = None
+        async with limit:
+            for attempt in range(self._max_attempts):
+                if attempt:
+                    self._stats["retries"] += 1
+                    await asyncio.sleep(RETRY_BACKOFF * 2 ** (attempt - 1))
+                try:
+                    async with self._client.request(
+                        "POST", url, data=payload, headers=JSON_HEADERS, timeout=self._timeout
+                    ) as response:
+                        status = response.status
+                except (aiohttp.ClientError, asyncio.TimeoutError) as err:
+                    error = err
+                    continue
+
+                if 200 <= status < 300:
+                    now = time.monotonic()
+                    self._latencies.extend(now - queued_at for _, _, queued_at in batch)
+                    self._stats["delivered"] += len(batch)
+                    self._stats["batches"] += 1
+                    _LOGGER.debug("Delivered %d webhook payloads to %s", len(batch), url)
+                    return
+
+                error = f"HTTP {status}"
+                # Client errors other than rate limiting will not go away
+                if status < 500 and status != 429:
+                    break
+
+        self._stats["failed"] += len(batch)
+        _LOGGER.error("Failed to send %d webhook payloads to %s: %s", len(batch), url, error)